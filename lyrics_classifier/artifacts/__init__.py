@@ -0,0 +1,349 @@
+"""
+Artifacts
+=========
+
+This module provides a versioned artifact format for trained models and
+vectorizer state, designed for fast loading by short-lived processes.
+
+An artifact is a directory of versions, each written to its own
+subdirectory, and a :code:`current` pointer file naming the current
+version. A version holds:
+
+- one uncompressed `.npy` file per array, loaded with :code:`mmap`, so
+  that loading only maps the files and concurrent worker processes share
+  the same pages of the operating system's page cache;
+- compact vocabularies, stored as a UTF-8 blob and an offsets array
+  instead of pickled lists of strings;
+- a `manifest.json` file with the format version, the dtype, shape and
+  SHA-256 checksum of each array, and free-form metadata.
+
+A new version is written to a temporary directory first and renamed,
+then the pointer file is atomically replaced, so readers always resolve
+a complete version and never find the artifact missing. The previous
+version is kept, as readers may still be loading it; older ones are
+removed.
+"""
+
+# Standard Library ---------------------------------------------------------------------
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Sequence
+
+# Data Science
+import numpy as np
+
+# Project ------------------------------------------------------------------------------
+from lyrics_classifier.writer import write_text_atomic
+
+
+ARTIFACT_FORMAT = "lyrics-classifier-artifact"
+ARTIFACT_VERSION = 1
+CURRENT_FILE_NAME = "current"
+
+
+class ArtifactError(Exception):
+    """Raised when an artifact is missing, corrupt or of another format
+    version."""
+
+
+class Vocabulary(Sequence[str]):
+    """Compact, read-only table of strings.
+
+    Strings are decoded lazily from a UTF-8 blob, sliced with an offsets
+    array, so that loading a vocabulary does not materialize its strings.
+
+    Parameters
+    ----------
+    blob
+        UTF-8 encoded strings, concatenated.
+    offsets
+        Start offset of each string in the blob, followed by the blob
+        length.
+    """
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray) -> None:
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings: Sequence[str]) -> "Vocabulary":
+        """Build a vocabulary from strings.
+
+        Parameters
+        ----------
+        strings
+            Strings.
+
+        Returns
+        -------
+        :code:`Vocabulary`
+            Vocabulary.
+        """
+        encoded = [string.encode("utf-8") for string in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(string) for string in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Vocabulary index out of range.")
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.blob[start:end].tobytes().decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        return (self[index] for index in range(len(self)))
+
+
+class Artifact(NamedTuple):
+    """Loaded artifact."""
+
+    arrays: Dict[str, np.ndarray]
+    vocabularies: Dict[str, Vocabulary]
+    metadata: dict
+
+
+def save_artifact(
+    artifact_dir_path: Path,
+    arrays: Dict[str, np.ndarray],
+    vocabularies: Dict[str, Sequence[str]] = None,
+    metadata: dict = None,
+) -> None:
+    """Save an artifact as its new current version.
+
+    .. warning::
+        This function will remove all but the previous version of an
+        existing artifact.
+
+    Parameters
+    ----------
+    artifact_dir_path
+        Artifact directory path.
+    arrays
+        Arrays, keyed by name.
+    vocabularies
+        Vocabularies (sequences of strings), keyed by name.
+    metadata
+        JSON serializable metadata.
+
+    Returns
+    -------
+    :code:`None`
+    """
+    vocabularies = vocabularies or {}
+
+    version = f"v-{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    temporary_dir_path = artifact_dir_path.joinpath(f".{version}.tmp")
+    temporary_dir_path.mkdir(parents=True)
+
+    try:
+        manifest = {
+            "format": ARTIFACT_FORMAT,
+            "version": ARTIFACT_VERSION,
+            "arrays": {},
+            "vocabularies": sorted(vocabularies),
+            "metadata": metadata or {},
+        }
+
+        for name, strings in vocabularies.items():
+            vocabulary = Vocabulary.from_strings(strings)
+            arrays = {
+                **arrays,
+                f"{name}.blob": vocabulary.blob,
+                f"{name}.offsets": vocabulary.offsets,
+            }
+
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            file_name = f"{name}.npy"
+            np.save(temporary_dir_path.joinpath(file_name), array)
+            manifest["arrays"][name] = {
+                "file": file_name,
+                "dtype": array.dtype.str,
+                "shape": list(array.shape),
+                "sha256": _sha256(temporary_dir_path.joinpath(file_name)),
+            }
+
+        temporary_dir_path.joinpath("manifest.json").write_text(
+            json.dumps(manifest, indent=2)
+        )
+
+        os.replace(temporary_dir_path, artifact_dir_path.joinpath(version))
+    except BaseException:
+        shutil.rmtree(temporary_dir_path, ignore_errors=True)
+        raise
+
+    current_file_path = artifact_dir_path.joinpath(CURRENT_FILE_NAME)
+    previous_version = (
+        current_file_path.read_text().strip() if current_file_path.exists() else None
+    )
+    write_text_atomic(current_file_path, version)
+
+    for version_dir_path in artifact_dir_path.glob("v-*"):
+        if version_dir_path.name not in (version, previous_version):
+            shutil.rmtree(version_dir_path, ignore_errors=True)
+
+
+def current_version_dir_path(artifact_dir_path: Path) -> Path:
+    """Resolve the current version directory of an artifact.
+
+    Parameters
+    ----------
+    artifact_dir_path
+        Artifact directory path.
+
+    Raises
+    ------
+    :code:`ArtifactError`
+        If the artifact has no current version.
+
+    Returns
+    -------
+    :code:`Path`
+        Current version directory path.
+    """
+    try:
+        version = artifact_dir_path.joinpath(CURRENT_FILE_NAME).read_text().strip()
+    except FileNotFoundError:
+        raise ArtifactError(f"No artifact found in {artifact_dir_path}.") from None
+
+    return artifact_dir_path.joinpath(version)
+
+
+def load_manifest(artifact_dir_path: Path) -> dict:
+    """Load and validate the manifest of an artifact's current version.
+
+    Parameters
+    ----------
+    artifact_dir_path
+        Artifact directory path.
+
+    Raises
+    ------
+    :code:`ArtifactError`
+        If the artifact is missing or of another format version.
+
+    Returns
+    -------
+    :code:`dict`
+        Artifact manifest.
+    """
+    return _load_version_manifest(current_version_dir_path(artifact_dir_path))
+
+
+def load_artifact(
+    artifact_dir_path: Path, mmap: bool = True, verify: bool = False
+) -> Artifact:
+    """Load the current version of an artifact.
+
+    Parameters
+    ----------
+    artifact_dir_path
+        Artifact directory path.
+    mmap
+        Memory-map the arrays (read-only) instead of reading them.
+    verify
+        Verify the checksums of the array files, which reads them in
+        full.
+
+    Raises
+    ------
+    :code:`ArtifactError`
+        If the artifact is missing, of another format version or does
+        not match its manifest.
+
+    Returns
+    -------
+    :code:`Artifact`
+        Artifact arrays, vocabularies and metadata.
+    """
+    # Resolved once, so that all the files come from the same version:
+    version_dir_path = current_version_dir_path(artifact_dir_path)
+    manifest = _load_version_manifest(version_dir_path)
+
+    arrays = {}
+    for name, entry in manifest["arrays"].items():
+        array_file_path = version_dir_path.joinpath(entry["file"])
+        if verify and _sha256(array_file_path) != entry["sha256"]:
+            raise ArtifactError(f"Checksum mismatch for {array_file_path}.")
+
+        array = np.load(array_file_path, mmap_mode="r" if mmap else None)
+        if array.dtype.str != entry["dtype"] or list(array.shape) != entry["shape"]:
+            raise ArtifactError(f"Dtype or shape mismatch for {array_file_path}.")
+        arrays[name] = array
+
+    vocabularies = {
+        name: Vocabulary(arrays.pop(f"{name}.blob"), arrays.pop(f"{name}.offsets"))
+        for name in manifest["vocabularies"]
+    }
+
+    return Artifact(arrays, vocabularies, manifest["metadata"])
+
+
+def verify_artifact(artifact_dir_path: Path) -> List[str]:
+    """Verify the checksums of the array files of an artifact's current
+    version.
+
+    Parameters
+    ----------
+    artifact_dir_path
+        Artifact directory path.
+
+    Raises
+    ------
+    :code:`ArtifactError`
+        If the artifact is missing or of another format version.
+
+    Returns
+    -------
+    :code:`List[str]`
+        Names of the arrays whose file is missing or does not match its
+        checksum.
+    """
+    version_dir_path = current_version_dir_path(artifact_dir_path)
+    manifest = _load_version_manifest(version_dir_path)
+
+    return [
+        name
+        for name, entry in manifest["arrays"].items()
+        if not version_dir_path.joinpath(entry["file"]).exists()
+        or _sha256(version_dir_path.joinpath(entry["file"])) != entry["sha256"]
+    ]
+
+
+def _load_version_manifest(version_dir_path: Path) -> dict:
+    manifest_file_path = version_dir_path.joinpath("manifest.json")
+
+    if not manifest_file_path.exists():
+        raise ArtifactError(f"No artifact found in {version_dir_path}.")
+
+    manifest = json.loads(manifest_file_path.read_text())
+
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise ArtifactError(f"Unknown artifact format in {version_dir_path}.")
+    if manifest.get("version") != ARTIFACT_VERSION:
+        raise ArtifactError(
+            f"Artifact format version {manifest.get('version')} in "
+            f"{version_dir_path}, expected version {ARTIFACT_VERSION}."
+        )
+
+    return manifest
+
+
+def _sha256(file_path: Path) -> str:
+    digest = hashlib.sha256()
+    with file_path.open("rb") as file:
+        for chunk in iter(lambda: file.read(2 ** 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
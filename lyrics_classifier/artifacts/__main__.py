@@ -0,0 +1,52 @@
+"""
+Artifacts
+=========
+
+This script inspects artifacts: it prints the format version, arrays and
+metadata of an artifact directory, and verifies the array checksums with
+:code:`--verify`.
+"""
+# Standard Library ---------------------------------------------------------------------
+import argparse
+import sys
+from pathlib import Path
+
+# Project ------------------------------------------------------------------------------
+from lyrics_classifier import artifacts, paths
+from lyrics_classifier.logger import LogLevel, print_table, print_table_entry
+
+
+parser = argparse.ArgumentParser(prog="python -m lyrics_classifier.artifacts")
+parser.add_argument(
+    "artifact_dir",
+    nargs="?",
+    type=Path,
+    help="Artifact directory, defaults to the artist classifier model.",
+)
+parser.add_argument("--verify", action="store_true")
+args = parser.parse_args()
+
+artifact_dir_path = args.artifact_dir or paths.model_dir_path()
+
+try:
+    version_dir_path = artifacts.current_version_dir_path(artifact_dir_path)
+    manifest = artifacts.load_manifest(artifact_dir_path)
+except artifacts.ArtifactError as err:
+    print_table_entry("Artifact", str(err), LogLevel.ERROR)
+    sys.exit(1)
+
+print_table(f"ARTIFACT: {artifact_dir_path.name}")
+print_table_entry("Current", version_dir_path.name, LogLevel.INFO)
+print_table_entry("Version", str(manifest["version"]), LogLevel.INFO)
+for name, entry in manifest["arrays"].items():
+    print_table_entry(name, f"{entry['dtype']} {tuple(entry['shape'])}", LogLevel.INFO)
+for key, value in manifest["metadata"].items():
+    print_table_entry(key, str(value), LogLevel.INFO)
+
+if args.verify:
+    corrupt = artifacts.verify_artifact(artifact_dir_path)
+    for name in corrupt:
+        print_table_entry(name, "Checksum mismatch.", LogLevel.ERROR)
+    if corrupt:
+        sys.exit(1)
+    print_table_entry("Checksums", "Verified.", LogLevel.INFO)
@@ -4,19 +4,85 @@ Collect Data
 
 This script includes the main steps for retrieving and parsing HTML
 pages from `lyrics.com` to extract lyrics.
+
+With :code:`--delta`, artist pages are refreshed and only the songs added
+or changed since the last run are deduplicated, retrieved and parsed.
+The artist snapshots are only updated once the whole run has completed,
+so an interrupted run is picked up again by the next one.
+
+With :code:`--shard i/N`, only the artists of the i-th of N roster shards
+are processed, into the shard's own songs CSV files, so that several
+nodes can split the roster between them. Once all the shards are
+collected, :code:`--merge-shards N` combines their songs CSV files into
+the songs CSV file used by the downstream stages.
 """
+# Standard Library ---------------------------------------------------------------------
+import argparse
+from pathlib import Path
+
 # Data Science
 import pandas as pd
 
 # Project ------------------------------------------------------------------------------
-from lyrics_classifier import paths
-from lyrics_classifier.collect_data import clean, process, scrap
+from lyrics_classifier import environment, paths
+from lyrics_classifier.collect_data import clean, process, scrap, snapshot
+from lyrics_classifier.roster import parse_shard
+
+
+def _read_songs_csv(songs_csv_file_path: Path) -> pd.DataFrame:
+    # Keep values as written (e.g. no float years), missing files are empty:
+    if not songs_csv_file_path.exists():
+        return pd.DataFrame(columns=["artist", "song_title", "song_path"])
+    return pd.read_csv(songs_csv_file_path, dtype=str, keep_default_na=False)
 
 
-scrap.retrieve_artists_html_pages()
-process.artists_html_pages_to_songs_csv()
-clean.drop_duplicate_songs(pd.read_csv(paths.songs_csv_file_path())).to_csv(
-    paths.songs_csv_file_path()
+parser = argparse.ArgumentParser(prog="python -m lyrics_classifier.collect_data")
+parser.add_argument(
+    "--delta",
+    action="store_true",
+    help="Only process songs added or changed since the last artist snapshots.",
 )
-scrap.retrieve_songs_html_pages()
-process.songs_html_pages_to_lyrics_text()
+parser.add_argument(
+    "--shard",
+    type=parse_shard,
+    help="Only process the artists of a roster shard, e.g. 0/4 to 3/4.",
+)
+parser.add_argument(
+    "--merge-shards",
+    type=int,
+    metavar="N",
+    help="Combine the songs CSV files of N collected roster shards and exit.",
+)
+args = parser.parse_args()
+shard = args.shard
+
+
+if args.merge_shards:
+    process.merge_shards_songs_csv(args.merge_shards)
+elif args.delta:
+    scrap.retrieve_artists_html_pages(force=True, shard=shard)
+    process.artists_html_pages_to_songs_delta_csv(shard=shard)
+    songs_df = _read_songs_csv(paths.songs_csv_file_path(shard))
+    removed_songs_df = _read_songs_csv(paths.songs_removed_csv_file_path(shard))
+    clean.drop_duplicate_delta_songs(
+        _read_songs_csv(paths.songs_delta_csv_file_path(shard)),
+        songs_df[~songs_df["song_path"].isin(removed_songs_df["song_path"])],
+        processes=None,
+    ).to_csv(paths.songs_delta_csv_file_path(shard), index=False)
+    process.merge_songs_delta_csv(shard=shard)
+    scrap.retrieve_songs_html_pages(
+        songs_csv_file_path=paths.songs_delta_csv_file_path(shard)
+    )
+    process.songs_html_pages_to_lyrics_text(
+        songs_csv_file_path=paths.songs_delta_csv_file_path(shard)
+    )
+    snapshot.commit_snapshots(environment.get_artists(shard))
+else:
+    scrap.retrieve_artists_html_pages(shard=shard)
+    process.artists_html_pages_to_songs_csv(shard=shard)
+    clean.drop_duplicate_songs(
+        pd.read_csv(paths.songs_csv_file_path(shard)), processes=None
+    ).to_csv(paths.songs_csv_file_path(shard))
+    scrap.retrieve_songs_html_pages(shard=shard)
+    process.songs_html_pages_to_lyrics_text(shard=shard)
+    snapshot.commit_snapshots(environment.get_artists(shard))
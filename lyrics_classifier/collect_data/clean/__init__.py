@@ -9,6 +9,8 @@ This module provides various methods for cleaning up the scraped data.
 import itertools
 import re
 import string
+from multiprocessing import Pool
+from typing import List, Tuple
 
 # Third Party --------------------------------------------------------------------------
 from fuzzywuzzy import fuzz
@@ -18,7 +20,7 @@ import pandas as pd
 
 
 def drop_duplicate_songs(
-    df: pd.DataFrame, fuzzy_score_threshold: int = 85
+    df: pd.DataFrame, fuzzy_score_threshold: int = 85, processes: int = 1
 ) -> pd.DataFrame:
     """Drop duplicate songs with manual filtering and fuzzy_wuzzy comparison.
 
@@ -28,6 +30,10 @@ def drop_duplicate_songs(
         Songs dataframe.
     fuzzy_score_threshold
         Fuzzy score threshold.
+    processes
+        Number of worker processes for the fuzzy_wuzzy comparison,
+        :code:`None` uses all the CPUs and :code:`1` runs it in the current
+        process. Both give identical results.
 
     Returns
     -------
@@ -40,7 +46,10 @@ def drop_duplicate_songs(
 
     # Fuzzy wuzzy matching
     df["fuzzy_score"] = 0
-    df = df.groupby("artist").apply(compute_fuzzy_score)
+    if processes == 1:
+        df = df.groupby("artist").apply(compute_fuzzy_score)
+    else:
+        df["fuzzy_score"] = compute_fuzzy_score_parallel(df, processes)
     df.drop(df[df["fuzzy_score"] > fuzzy_score_threshold].index, inplace=True)
 
     # Clean up
@@ -50,6 +59,95 @@ def drop_duplicate_songs(
     return df
 
 
+def drop_duplicate_delta_songs(
+    delta_df: pd.DataFrame,
+    songs_df: pd.DataFrame,
+    fuzzy_score_threshold: int = 85,
+    processes: int = 1,
+) -> pd.DataFrame:
+    """Drop duplicate songs from a songs delta, including duplicates of
+    songs already in the songs CSV file.
+
+    The delta is first deduplicated on its own with
+    :meth:`drop_duplicate_songs`. Each remaining delta song is then
+    compared with the existing songs of its artist, with the same manual
+    filtering and fuzzy_wuzzy comparison: it is dropped if it duplicates
+    one of them. Existing songs are always kept, as they have already been
+    retrieved.
+
+    Parameters
+    ----------
+    delta_df
+        Songs delta dataframe.
+    songs_df
+        Songs dataframe the delta is merged into (i.e. without the removed
+        songs). Songs replaced by the delta (same song path) are ignored.
+    fuzzy_score_threshold
+        Fuzzy score threshold.
+    processes
+        Number of worker processes for the fuzzy_wuzzy comparison,
+        :code:`None` uses all the CPUs and :code:`1` runs it in the current
+        process.
+
+    Returns
+    -------
+    :code:`pd.DataFrame`
+        Songs delta dataframe with removed duplicates.
+    """
+    delta_df = drop_duplicate_songs(delta_df, fuzzy_score_threshold, processes)
+
+    songs_df = songs_df[
+        songs_df["artist"].isin(delta_df["artist"])
+        & ~songs_df["song_path"].isin(delta_df["song_path"])
+    ]
+    existing_song_titles = {
+        artist: group.transform(uniformize_song_title).tolist()
+        for artist, group in songs_df.groupby("artist")["song_title"]
+    }
+
+    # Manual title uniformization
+    delta_df["uniformized_song_title"] = delta_df["song_title"].transform(
+        uniformize_song_title
+    )
+    is_duplicate = pd.Series(
+        [
+            song_title in existing_song_titles.get(artist, ())
+            for artist, song_title in zip(
+                delta_df["artist"], delta_df["uniformized_song_title"]
+            )
+        ],
+        index=delta_df.index,
+    )
+
+    # Fuzzy wuzzy matching
+    groups = [
+        (index, existing_song_titles[artist])
+        for artist, index in delta_df.groupby("artist").groups.items()
+        if artist in existing_song_titles
+    ]
+    tasks = (
+        (i, delta_df.loc[index, "uniformized_song_title"].tolist(), song_titles)
+        for i, (index, song_titles) in enumerate(groups)
+    )
+    fuzzy_score = pd.Series(0, index=delta_df.index)
+    pool = Pool(processes) if processes != 1 else None
+    try:
+        mapper = pool.imap_unordered if pool else map
+        for i, scores in mapper(_compute_max_existing_fuzzy_scores, tasks):
+            fuzzy_score[groups[i][0]] = scores
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    is_duplicate |= fuzzy_score > fuzzy_score_threshold
+
+    # Clean up
+    delta_df = delta_df[~is_duplicate].drop(["uniformized_song_title"], axis=1)
+    delta_df.reset_index(drop=True, inplace=True)
+
+    return delta_df
+
+
 def uniformize_song_title(song_title: str) -> str:
     """Apply basic manual title uniformization transformations.
 
@@ -114,3 +212,73 @@ def compute_fuzzy_score(df: pd.DataFrame) -> pd.DataFrame:
             df.loc[idx1, "fuzzy_score"], fuzz.ratio(song_title1, song_title2)
         )
     return df
+
+
+def compute_fuzzy_score_parallel(df: pd.DataFrame, processes: int = None) -> pd.Series:
+    """Perform pairwise comparisons per artist in parallel worker processes.
+
+    Equivalent to applying :meth:`compute_fuzzy_score` to each artist
+    group. Only the uniformized song titles are sent to the workers, and
+    the largest artists (which have quadratically more comparisons) are
+    scheduled first so that they do not end up as stragglers.
+
+    Parameters
+    ----------
+    df
+        Songs dataframe with an "artist" and a "uniformized_song_title"
+        column.
+    processes
+        Number of worker processes, :code:`None` uses all the CPUs.
+
+    Returns
+    -------
+    :code:`pd.Series`
+        Maximum fuzzy score, aligned with the dataframe index.
+    """
+    fuzzy_score = pd.Series(0, index=df.index)
+
+    groups = [
+        group.index
+        for _, group in df.groupby("artist")["uniformized_song_title"]
+        if len(group) > 1
+    ]
+    groups.sort(key=len, reverse=True)
+    tasks = (
+        (i, df.loc[index, "uniformized_song_title"].tolist())
+        for i, index in enumerate(groups)
+    )
+
+    with Pool(processes) as pool:
+        for i, scores in pool.imap_unordered(_compute_max_fuzzy_scores, tasks):
+            fuzzy_score[groups[i]] = scores
+
+    return fuzzy_score
+
+
+def _compute_max_fuzzy_scores(task: Tuple[int, List[str]]) -> Tuple[int, List[int]]:
+    i, song_titles = task
+
+    # Same comparisons as in compute_fuzzy_score:
+    scores = [0] * len(song_titles)
+    for (idx1, song_title1), (_, song_title2) in itertools.combinations(
+        enumerate(song_titles), 2
+    ):
+        scores[idx1] = max(scores[idx1], fuzz.ratio(song_title1, song_title2))
+
+    return i, scores
+
+
+def _compute_max_existing_fuzzy_scores(
+    task: Tuple[int, List[str], List[str]]
+) -> Tuple[int, List[int]]:
+    i, song_titles, existing_song_titles = task
+
+    scores = [
+        max(
+            (fuzz.ratio(song_title, existing) for existing in existing_song_titles),
+            default=0,
+        )
+        for song_title in song_titles
+    ]
+
+    return i, scores
@@ -0,0 +1,339 @@
+"""
+Jobs
+====
+
+This module provides a durable SQLite-backed job queue, so that several
+scraper processes (or hosts sharing the data volume) can share the work.
+
+Jobs are identified by a kind and a key and are enqueued at most once.
+Workers lease jobs for a visibility timeout: a job whose lease expires
+(e.g. because its worker crashed) becomes available again. Failed jobs
+are retried with exponential backoff and are dead-lettered after
+`max_attempts` attempts.
+
+.. note::
+    The database uses SQLite's default rollback journal rather than WAL,
+    as WAL relies on shared memory which is not available on network
+    file systems. Leasing relies on SQLite's file locks, so the shared
+    volume must support POSIX locks.
+"""
+
+# Standard Library ---------------------------------------------------------------------
+import contextlib
+import json
+import os
+import socket
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# Project ------------------------------------------------------------------------------
+from lyrics_classifier import paths
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    last_error TEXT,
+    UNIQUE (kind, key)
+);
+CREATE INDEX IF NOT EXISTS jobs_by_state ON jobs (state, kind, available_at);
+CREATE INDEX IF NOT EXISTS jobs_by_availability ON jobs (state, available_at);
+CREATE INDEX IF NOT EXISTS jobs_by_lease_expiry ON jobs (state, lease_expires_at);
+"""
+
+
+class Job(NamedTuple):
+    """Leased job."""
+
+    id: int
+    kind: str
+    key: str
+    payload: dict
+    attempts: int
+    lease_owner: str
+
+
+class JobQueue:
+    """Durable job queue backed by a SQLite database.
+
+    Parameters
+    ----------
+    db_file_path
+        SQLite database file path, defaults to
+        :meth:`paths.jobs_db_file_path`.
+    visibility_timeout
+        Lease duration in seconds, after which a job is handed out again.
+    max_attempts
+        Number of attempts after which a job is dead-lettered.
+    retry_delay
+        Delay before the first retry in seconds, doubled on every attempt.
+    """
+
+    def __init__(
+        self,
+        db_file_path: Path = None,
+        visibility_timeout: float = 300,
+        max_attempts: int = 5,
+        retry_delay: float = 30,
+    ) -> None:
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        # Transactions are handled explicitly (see _transaction):
+        self.connection = sqlite3.connect(
+            str(db_file_path or paths.jobs_db_file_path()),
+            timeout=60,
+            isolation_level=None,
+        )
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection.
+
+        Returns
+        -------
+        :code:`None`
+        """
+        self.connection.close()
+
+    def enqueue(
+        self, kind: str, jobs: Iterable[Tuple[str, dict]], reset: bool = False
+    ) -> int:
+        """Enqueue jobs.
+
+        Jobs that are already enqueued (with the same kind and key) are
+        ignored, unless `reset` is set.
+
+        Parameters
+        ----------
+        kind
+            Job kind.
+        jobs
+            Job keys and payloads.
+        reset
+            Make already enqueued jobs pending again, whatever their state.
+
+        Returns
+        -------
+        :code:`int`
+            Number of enqueued or reset jobs.
+        """
+        query = (
+            "INSERT INTO jobs (kind, key, payload) VALUES (?, ?, ?)"
+            " ON CONFLICT (kind, key) DO UPDATE SET"
+            " payload = excluded.payload, state = 'pending', attempts = 0,"
+            " available_at = 0, lease_owner = NULL, lease_expires_at = NULL,"
+            " last_error = NULL"
+            if reset
+            else "INSERT OR IGNORE INTO jobs (kind, key, payload) VALUES (?, ?, ?)"
+        )
+        with self._transaction():
+            return self.connection.executemany(
+                query, ((kind, key, json.dumps(payload)) for key, payload in jobs)
+            ).rowcount
+
+    def lease(self, worker_id: str, kinds: Iterable[str] = None) -> Optional[Job]:
+        """Lease the next available job.
+
+        Jobs whose lease has expired are available again, or are
+        dead-lettered if they have used up their attempts.
+
+        Parameters
+        ----------
+        worker_id
+            Worker identifier, recorded as the lease owner.
+        kinds
+            Job kinds to consider, defaults to all kinds.
+
+        Returns
+        -------
+        :code:`Optional[Job]`
+            Leased job, or :code:`None` if no job is currently available.
+        """
+        now = time.time()
+        kinds = list(kinds or [])
+
+        with self._transaction():
+            self.connection.execute(
+                "UPDATE jobs SET state = 'dead', last_error = 'Lease expired.'"
+                " WHERE state = 'leased' AND lease_expires_at <= ? AND attempts >= ?",
+                (now, self.max_attempts),
+            )
+            # Expired leases first, then pending jobs: each lookup walks a
+            # single index, instead of sorting every available job while
+            # holding the database lock:
+            row = self._select_available("leased", "lease_expires_at", now, kinds)
+            if row is None:
+                row = self._select_available("pending", "available_at", now, kinds)
+            if row is None:
+                return None
+
+            job_id, kind, key, payload, attempts = row
+            self.connection.execute(
+                "UPDATE jobs SET state = 'leased', attempts = attempts + 1,"
+                " lease_owner = ?, lease_expires_at = ? WHERE id = ?",
+                (worker_id, now + self.visibility_timeout, job_id),
+            )
+
+        return Job(job_id, kind, key, json.loads(payload), attempts + 1, worker_id)
+
+    def extend(self, job: Job) -> bool:
+        """Extend the lease of a job by the visibility timeout.
+
+        Parameters
+        ----------
+        job
+            Leased job.
+
+        Returns
+        -------
+        :code:`bool`
+            Whether the lease was still held.
+        """
+        return self._update_leased(
+            job, "lease_expires_at = ?", (time.time() + self.visibility_timeout,),
+        )
+
+    def complete(self, job: Job) -> bool:
+        """Mark a leased job as done.
+
+        Parameters
+        ----------
+        job
+            Leased job.
+
+        Returns
+        -------
+        :code:`bool`
+            Whether the lease was still held; if not, the job has been
+            handed to another worker and its outcome is left to them.
+        """
+        return self._update_leased(
+            job, "state = 'done', lease_owner = NULL, lease_expires_at = NULL", ()
+        )
+
+    def fail(self, job: Job, error: str, retry: bool = True) -> bool:
+        """Mark a leased job as failed.
+
+        The job is retried after an exponential backoff, or dead-lettered
+        if it should not be retried or has used up its attempts.
+
+        Parameters
+        ----------
+        job
+            Leased job.
+        error
+            Error message, recorded on the job.
+        retry
+            Whether the job may be retried.
+
+        Returns
+        -------
+        :code:`bool`
+            Whether the lease was still held.
+        """
+        if retry and job.attempts < self.max_attempts:
+            available_at = time.time() + self.retry_delay * 2 ** (job.attempts - 1)
+            return self._update_leased(
+                job,
+                "state = 'pending', available_at = ?, last_error = ?,"
+                " lease_owner = NULL, lease_expires_at = NULL",
+                (available_at, error),
+            )
+        return self._update_leased(
+            job,
+            "state = 'dead', last_error = ?, lease_owner = NULL,"
+            " lease_expires_at = NULL",
+            (error,),
+        )
+
+    def requeue_dead(self, kinds: Iterable[str] = None) -> int:
+        """Make dead-lettered jobs pending again with fresh attempts.
+
+        Parameters
+        ----------
+        kinds
+            Job kinds to consider, defaults to all kinds.
+
+        Returns
+        -------
+        :code:`int`
+            Number of requeued jobs.
+        """
+        kinds = list(kinds or [])
+        kinds_filter = f" AND kind IN ({', '.join('?' * len(kinds))})" if kinds else ""
+        with self._transaction():
+            return self.connection.execute(
+                "UPDATE jobs SET state = 'pending', attempts = 0, available_at = 0"
+                f" WHERE state = 'dead'{kinds_filter}",
+                kinds,
+            ).rowcount
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return the number of jobs per kind and state.
+
+        Returns
+        -------
+        :code:`Dict[str, Dict[str, int]]`
+            Number of jobs, keyed by kind and state.
+        """
+        stats = {}
+        for kind, state, count in self.connection.execute(
+            "SELECT kind, state, COUNT(*) FROM jobs GROUP BY kind, state"
+        ):
+            stats.setdefault(kind, {})[state] = count
+        return stats
+
+    def _select_available(
+        self, state: str, time_column: str, now: float, kinds: List[str]
+    ) -> Optional[tuple]:
+        kinds_filter = f" AND kind IN ({', '.join('?' * len(kinds))})" if kinds else ""
+        return self.connection.execute(
+            "SELECT id, kind, key, payload, attempts FROM jobs"
+            f" WHERE state = ? AND {time_column} <= ?{kinds_filter}"
+            f" ORDER BY {time_column} LIMIT 1",
+            (state, now, *kinds),
+        ).fetchone()
+
+    def _update_leased(self, job: Job, assignments: str, parameters: tuple) -> bool:
+        with self._transaction():
+            return bool(
+                self.connection.execute(
+                    f"UPDATE jobs SET {assignments}"
+                    " WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+                    (*parameters, job.id, job.lease_owner),
+                ).rowcount
+            )
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[None]:
+        # Write transactions take the database lock upfront, so that concurrent
+        # workers cannot select the same job:
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+
+
+def default_worker_id() -> str:
+    """Return a worker identifier unique across hosts and processes.
+
+    Returns
+    -------
+    :code:`str`
+        Worker identifier, as "<hostname>:<pid>".
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
@@ -0,0 +1,76 @@
+"""
+Jobs
+====
+
+This script manages the shared HTML pages job queue.
+
+- :code:`enqueue-artists` and :code:`enqueue-songs` enqueue jobs
+  (:code:`--shard i/N` only enqueues the jobs of a roster shard).
+- :code:`work` retrieves HTML pages from queued jobs; any number of
+  workers can run concurrently, on any host sharing the data directory.
+- :code:`stats` prints the number of jobs per kind and state.
+- :code:`requeue-dead` makes dead-lettered jobs pending again.
+"""
+# Standard Library ---------------------------------------------------------------------
+import argparse
+
+# Project ------------------------------------------------------------------------------
+from lyrics_classifier.collect_data import scrap
+from lyrics_classifier.collect_data.jobs import JobQueue
+from lyrics_classifier.logger import LogLevel, print_table, print_table_entry
+from lyrics_classifier.roster import parse_shard
+
+
+parser = argparse.ArgumentParser(prog="python -m lyrics_classifier.collect_data.jobs")
+parser.add_argument("--visibility-timeout", type=float, default=300)
+parser.add_argument("--max-attempts", type=int, default=5)
+parser.add_argument("--retry-delay", type=float, default=30)
+subparsers = parser.add_subparsers(dest="command", required=True)
+
+for command in ("enqueue-artists", "enqueue-songs"):
+    enqueue_parser = subparsers.add_parser(command)
+    enqueue_parser.add_argument("--force", action="store_true")
+    enqueue_parser.add_argument("--shard", type=parse_shard)
+
+work_parser = subparsers.add_parser("work")
+work_parser.add_argument("--worker-id")
+work_parser.add_argument(
+    "--kind", action="append", choices=(scrap.ARTIST_JOB, scrap.SONG_JOB)
+)
+work_parser.add_argument("--wait", action="store_true")
+
+subparsers.add_parser("stats")
+
+subparsers.add_parser("requeue-dead").add_argument(
+    "--kind", action="append", choices=(scrap.ARTIST_JOB, scrap.SONG_JOB)
+)
+
+args = parser.parse_args()
+
+queue = JobQueue(
+    visibility_timeout=args.visibility_timeout,
+    max_attempts=args.max_attempts,
+    retry_delay=args.retry_delay,
+)
+
+if args.command == "enqueue-artists":
+    scrap.enqueue_artists_html_pages_jobs(queue, args.force, args.shard)
+elif args.command == "enqueue-songs":
+    scrap.enqueue_songs_html_pages_jobs(queue, args.force, args.shard)
+elif args.command == "work":
+    scrap.work_html_pages_jobs(queue, args.worker_id, args.kind, args.wait)
+elif args.command == "stats":
+    print_table("JOBS")
+    for kind, states in queue.stats().items():
+        print_table_entry(
+            kind,
+            " | ".join(f"{state}: {count}" for state, count in sorted(states.items())),
+            LogLevel.INFO,
+        )
+elif args.command == "requeue-dead":
+    print_table("JOBS")
+    print_table_entry(
+        "Dead jobs", f"{queue.requeue_dead(args.kind)} requeued.", LogLevel.INFO
+    )
+
+queue.close()
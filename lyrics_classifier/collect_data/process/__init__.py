@@ -7,21 +7,40 @@ This module provides methods for processing scraped data.
 
 # Standard Library ---------------------------------------------------------------------
 import csv
+import os
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
 
 # Project ------------------------------------------------------------------------------
-from lyrics_classifier import paths
-from lyrics_classifier.collect_data import lyrics_com
+from lyrics_classifier import environment, paths
+from lyrics_classifier.collect_data import lyrics_com, snapshot
 from lyrics_classifier.collect_data.process.song import Song
-from lyrics_classifier.environment import get_artists
 from lyrics_classifier.logger import LogLevel, print_table, print_table_entry
+from lyrics_classifier.roster import Shard
+from lyrics_classifier.writer import WriteBehindWriter
 
 
-def artists_html_pages_to_songs_csv() -> None:
+def artists_html_pages_to_songs_csv(processes: int = None, shard: Shard = None) -> None:
     """Convert artist HTML pages to a CSV file containing all the songs.
 
+    Artist pages are parsed in parallel worker processes and the songs are
+    streamed to the CSV file through a single writer, in artist order.
+    Pending artist snapshots are saved along the way, to be committed
+    once the songs have been processed (see :mod:`snapshot`).
+
     .. warning::
         This function will overwrite existing data.
 
+    Parameters
+    ----------
+    processes
+        Number of worker processes, :code:`None` uses all the CPUs and
+        :code:`1` parses the pages in the current process.
+    shard
+        Only parse the pages of the artists of this roster shard, into
+        the shard's own CSV files.
+
     Returns
     -------
     :code:`None`
@@ -30,32 +49,252 @@ def artists_html_pages_to_songs_csv() -> None:
 
     fieldnames = vars(Song()).keys()
 
-    with paths.songs_csv_file_path().open("w") as songs_csv_file:
-        writer = csv.DictWriter(songs_csv_file, fieldnames=fieldnames).writeheader()
+    with paths.songs_csv_file_path(shard).open("w", newline="") as songs_csv_file:
+        writer = csv.DictWriter(songs_csv_file, fieldnames=fieldnames)
+        writer.writeheader()
+
+        for artist, rows in _parse_artists_html_pages(processes, shard):
+            if rows is None:
+                print_table_entry(artist, "HTML page not available.", LogLevel.WARNING)
+            else:
+                writer.writerows(rows)
+                snapshot.save_snapshot(artist, rows, pending=True)
+                print_table_entry(
+                    artist, "HTML page parsed and songs saved.", LogLevel.INFO
+                )
+
+
+def artists_html_pages_to_songs_delta_csv(
+    processes: int = None, shard: Shard = None
+) -> None:
+    """Convert artist HTML pages to CSV files of the songs changed since the
+    last snapshots.
+
+    Each artist's songs are diffed against the artist's last snapshot
+    (keyed on the song path): added and changed songs are saved to the
+    songs delta CSV file, with a "change" column, and removed songs are
+    flagged in the removed songs CSV file. Pending snapshots are then
+    saved; once the delta has been processed and they are committed (see
+    :mod:`snapshot`), the next run only sees newer changes.
+
+    .. note::
+        The songs CSV file is left untouched, use
+        :meth:`merge_songs_delta_csv` to apply the delta to it.
+
+    .. warning::
+        This function will overwrite existing delta data.
+
+    Parameters
+    ----------
+    processes
+        Number of worker processes, :code:`None` uses all the CPUs and
+        :code:`1` parses the pages in the current process.
+    shard
+        Only parse the pages of the artists of this roster shard, into
+        the shard's own CSV files.
+
+    Returns
+    -------
+    :code:`None`
+    """
+    print_table("CSV SONGS DELTA")
+
+    fieldnames = [*vars(Song()).keys(), "change"]
 
-    for artist in get_artists():
+    with paths.songs_delta_csv_file_path(shard).open(
+        "w", newline=""
+    ) as songs_delta_csv_file, paths.songs_removed_csv_file_path(shard).open(
+        "w", newline=""
+    ) as songs_removed_csv_file:
+        delta_writer = csv.DictWriter(songs_delta_csv_file, fieldnames=fieldnames)
+        delta_writer.writeheader()
+        removed_writer = csv.DictWriter(songs_removed_csv_file, fieldnames=fieldnames)
+        removed_writer.writeheader()
 
-        artist_html_file_path = paths.artist_html_file_path(artist)
+        for artist, rows in _parse_artists_html_pages(processes, shard):
+            if rows is None:
+                print_table_entry(artist, "HTML page not available.", LogLevel.WARNING)
+                continue
 
-        if artist_html_file_path.exists():
-            songs = lyrics_com.extract_songs_from_artist_html_page(
-                artist, artist_html_file_path.read_text()
+            delta = snapshot.diff_songs(snapshot.load_snapshot(artist), rows)
+            delta_writer.writerows({**row, "change": "added"} for row in delta.added)
+            delta_writer.writerows(
+                {**row, "change": "changed"} for row in delta.changed
+            )
+            removed_writer.writerows(
+                {**row, "change": "removed"} for row in delta.removed
             )
+            snapshot.save_snapshot(artist, rows, pending=True)
 
-            with paths.songs_csv_file_path().open("a") as songs_csv_file:
-                csv.DictWriter(songs_csv_file, fieldnames=fieldnames).writerows(
-                    map(vars, songs)
-                )
             print_table_entry(
-                artist, "HTML page parsed and songs saved.", LogLevel.INFO
+                artist,
+                f"+{len(delta.added)} ~{len(delta.changed)} -{len(delta.removed)}"
+                " songs.",
+                LogLevel.INFO,
             )
+
+
+def merge_songs_delta_csv(shard: Shard = None) -> None:
+    """Apply the songs delta and removed songs CSV files to the songs CSV file.
+
+    Removed and changed songs are dropped from the songs CSV file and the
+    songs of the delta are appended. The songs CSV file is rewritten
+    through a temporary file, so it is never left half written.
+
+    Parameters
+    ----------
+    shard
+        Merge the CSV files of this roster shard.
+
+    Returns
+    -------
+    :code:`None`
+    """
+    print_table("CSV SONGS MERGE")
+
+    with paths.songs_delta_csv_file_path(shard).open("r") as songs_delta_csv_file:
+        delta_rows = list(csv.DictReader(songs_delta_csv_file))
+    with paths.songs_removed_csv_file_path(shard).open("r") as songs_removed_csv_file:
+        stale_song_paths = {
+            row["song_path"] for row in csv.DictReader(songs_removed_csv_file)
+        }
+    stale_song_paths.update(row["song_path"] for row in delta_rows)
+
+    songs_csv_file_path = paths.songs_csv_file_path(shard)
+    temporary_file_path = songs_csv_file_path.with_suffix(".csv.tmp")
+    kept = 0
+
+    with temporary_file_path.open("w", newline="") as temporary_file:
+        if songs_csv_file_path.exists():
+            with songs_csv_file_path.open("r") as songs_csv_file:
+                reader = csv.DictReader(songs_csv_file)
+                writer = csv.DictWriter(
+                    temporary_file, fieldnames=reader.fieldnames, extrasaction="ignore"
+                )
+                writer.writeheader()
+                for row in reader:
+                    if row["song_path"] not in stale_song_paths:
+                        writer.writerow(row)
+                        kept += 1
         else:
-            print_table_entry(artist, "HTML page not available.", LogLevel.WARNING)
+            writer = csv.DictWriter(
+                temporary_file, fieldnames=vars(Song()).keys(), extrasaction="ignore"
+            )
+            writer.writeheader()
+
+        writer.writerows(delta_rows)
+
+    os.replace(temporary_file_path, songs_csv_file_path)
+
+    print_table_entry("Songs", f"{kept} kept, {len(delta_rows)} merged.", LogLevel.INFO)
+
+
+def merge_shards_songs_csv(shard_count: int) -> None:
+    """Combine the songs CSV files of all the roster shards into the songs
+    CSV file.
+
+    Downstream stages (featurizing, indexing, similarity) read the songs
+    CSV file, so this step is needed once every shard has been collected.
+    The songs CSV file is rewritten through a temporary file, so it is
+    never left half written.
+
+    .. warning::
+        This function will overwrite existing data.
+
+    Parameters
+    ----------
+    shard_count
+        Number of roster shards.
+
+    Raises
+    ------
+    :code:`FileNotFoundError`
+        If the songs CSV file of any shard is missing, in which case the
+        songs CSV file is left untouched.
+
+    Returns
+    -------
+    :code:`None`
+    """
+    print_table("CSV SONGS SHARDS MERGE")
+
+    shards_songs_csv_file_paths = [
+        paths.songs_csv_file_path(Shard(index, shard_count))
+        for index in range(shard_count)
+    ]
+    missing = [path for path in shards_songs_csv_file_paths if not path.exists()]
+    if missing:
+        for path in missing:
+            print_table_entry(path.name, "Shard not collected.", LogLevel.ERROR)
+        raise FileNotFoundError(
+            "Missing shard songs CSV files: " + ", ".join(map(str, missing))
+        )
+
+    songs_csv_file_path = paths.songs_csv_file_path()
+    temporary_file_path = songs_csv_file_path.with_suffix(".csv.tmp")
+
+    with temporary_file_path.open("w", newline="") as temporary_file:
+        writer = csv.DictWriter(
+            temporary_file, fieldnames=vars(Song()).keys(), extrasaction="ignore"
+        )
+        writer.writeheader()
+
+        for path in shards_songs_csv_file_paths:
+            with path.open("r") as shard_songs_csv_file:
+                rows = list(csv.DictReader(shard_songs_csv_file))
+            writer.writerows(rows)
+            print_table_entry(path.name, f"{len(rows)} songs merged.", LogLevel.INFO)
+
+    os.replace(temporary_file_path, songs_csv_file_path)
 
 
-def songs_html_pages_to_lyrics_text() -> None:
+def _parse_artists_html_pages(
+    processes: int, shard: Shard = None
+) -> Iterator[Tuple[str, Optional[List[dict]]]]:
+    pool = Pool(processes) if processes != 1 else None
+    try:
+        mapper = pool.imap if pool else map
+        yield from mapper(_parse_artist_html_page, environment.get_artists(shard))
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+
+def _parse_artist_html_page(artist: str) -> Tuple[str, Optional[List[dict]]]:
+    artist_html_file_path = paths.artist_html_file_path(artist)
+
+    if not artist_html_file_path.exists():
+        return artist, None
+
+    songs = lyrics_com.extract_songs_from_artist_html_page(
+        artist, artist_html_file_path.read_text()
+    )
+    # Parsed values may be BeautifulSoup strings, which would drag the whole
+    # parse tree along when sent back from a worker process:
+    return (
+        artist,
+        [
+            {name: value and str(value) for name, value in vars(song).items()}
+            for song in songs
+        ],
+    )
+
+
+def songs_html_pages_to_lyrics_text(
+    songs_csv_file_path: Path = None, shard: Shard = None
+) -> None:
     """Convert song HTML pages to text files containing the lyrics.
 
+    Parameters
+    ----------
+    songs_csv_file_path
+        Songs CSV file path, defaults to :meth:`paths.songs_csv_file_path`
+        (e.g. :meth:`paths.songs_delta_csv_file_path` to only process the
+        songs delta).
+    shard
+        Roster shard, for the default songs CSV file path.
+
     Returns
     -------
     :code:`None`
@@ -64,7 +303,9 @@ def songs_html_pages_to_lyrics_text() -> None:
 
     fieldnames = vars(Song()).keys()
 
-    with paths.songs_csv_file_path().open("r") as songs_csv_file:
+    songs_csv_file_path = songs_csv_file_path or paths.songs_csv_file_path(shard)
+
+    with songs_csv_file_path.open("r") as songs_csv_file, WriteBehindWriter() as writer:
         reader = csv.DictReader(songs_csv_file)
 
         for song in map(lambda attributes: Song(**attributes), reader):
@@ -75,7 +316,7 @@ def songs_html_pages_to_lyrics_text() -> None:
                 lyrics = lyrics_com.extract_lyrics_from_song_html_page(
                     song_html_file_path.read_text()
                 )
-                paths.lyrics_text_file_path(song).write_text(lyrics)
+                writer.write_text(paths.lyrics_text_file_path(song), lyrics)
 
                 print_table_entry(
                     song.song_title, "HTML page parsed and songs saved.", LogLevel.INFO,
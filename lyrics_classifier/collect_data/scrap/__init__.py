@@ -9,19 +9,31 @@ pages.
     The functionality specific to `lyrics.com` page is contained in
     :mod:`lyrics_com`
 """
+
 # Standard Library ---------------------------------------------------------------------
 import csv
 import re
+import time
+from pathlib import Path
+from typing import Iterable
 
 # Third Party --------------------------------------------------------------------------
 import requests as req
 
 # Project ------------------------------------------------------------------------------
 import lyrics_classifier.paths as paths
+from lyrics_classifier import environment
 from lyrics_classifier.collect_data import lyrics_com
+from lyrics_classifier.collect_data.jobs import Job, JobQueue, default_worker_id
 from lyrics_classifier.collect_data.process.song import Song
-from lyrics_classifier.environment import get_artists
 from lyrics_classifier.logger import LogLevel, print_table, print_table_entry
+from lyrics_classifier.roster import Shard
+from lyrics_classifier.writer import WriteBehindWriter, write_text_atomic
+
+
+ARTIST_JOB = "artist"
+SONG_JOB = "song"
+FETCH_TIMEOUT = 30
 
 
 class CommunicationError(Exception):
@@ -36,25 +48,33 @@ class CommunicationError(Exception):
         self.status_code = status_code
 
 
-def fetch(url: str) -> str:
+def fetch(url: str, timeout: float = FETCH_TIMEOUT) -> str:
     """Fetch URL.
 
     Parameters
     ----------
     url
         URL.
+    timeout
+        Connect and read timeout, in seconds.
 
     Raises
     ------
     :code:`CommunicationError`
-        If the HTTP request is unsuccessful.
+        If the HTTP request is unsuccessful, times out or fails to connect
+        (without status code).
 
     Returns
     -------
     :code:`str`
         Body.
     """
-    res = req.get(url, allow_redirects=False)
+    try:
+        res = req.get(url, allow_redirects=False, timeout=timeout)
+    except req.RequestException as err:
+        raise CommunicationError(
+            f"Unexpected error in fetching html page: {url}\n\t{err}\n"
+        ) from err
     if re.match(r"^2\d{2}$", str(res.status_code)):
         return res.text
     else:
@@ -65,13 +85,15 @@ def fetch(url: str) -> str:
         )
 
 
-def retrieve_artists_html_pages(force: bool = False) -> None:
+def retrieve_artists_html_pages(force: bool = False, shard: Shard = None) -> None:
     """Retrieve and save artist HTML pages from `lyrics.com`.
 
     Parameters
     ----------
     force
         Overwrite HTML pages that have already been retrieved.
+    shard
+        Only retrieve the pages of the artists of this roster shard.
 
     Returns
     -------
@@ -79,35 +101,44 @@ def retrieve_artists_html_pages(force: bool = False) -> None:
     """
     print_table("ARTISTS HTML PAGES")
 
-    for artist in get_artists():
+    with WriteBehindWriter() as writer:
+        for artist in environment.get_artists(shard):
 
-        artist_html_file_path = paths.artist_html_file_path(artist)
+            artist_html_file_path = paths.artist_html_file_path(artist)
 
-        if artist_html_file_path.exists() and not force:
-            print_table_entry(artist, "HTML page already retrieved.", LogLevel.INFO)
-        else:
-            artist_url = lyrics_com.artist_url(artist)
-            try:
-                artist_html_page = fetch(artist_url)
-                artist_html_file_path.write_text(artist_html_page)
-                print_table_entry(
-                    artist, "HTML page retrieved and saved.", LogLevel.INFO
-                )
-            except CommunicationError as err:
-                print_table_entry(
-                    artist,
-                    f"Error in retrieving HTML page [{err.status_code}].",
-                    LogLevel.ERROR,
-                )
+            if artist_html_file_path.exists() and not force:
+                print_table_entry(artist, "HTML page already retrieved.", LogLevel.INFO)
+            else:
+                artist_url = lyrics_com.artist_url(artist)
+                try:
+                    artist_html_page = fetch(artist_url)
+                    writer.write_text(artist_html_file_path, artist_html_page)
+                    print_table_entry(
+                        artist, "HTML page retrieved and saved.", LogLevel.INFO
+                    )
+                except CommunicationError as err:
+                    print_table_entry(
+                        artist,
+                        f"Error in retrieving HTML page [{err.status_code}].",
+                        LogLevel.ERROR,
+                    )
 
 
-def retrieve_songs_html_pages(force: bool = False) -> None:
+def retrieve_songs_html_pages(
+    force: bool = False, songs_csv_file_path: Path = None, shard: Shard = None
+) -> None:
     """Retrieve and save song HTML pages from `lyrics.com`.
 
     Parameters
     ----------
     force
         Overwrite HTML pages that have already been retrieved.
+    songs_csv_file_path
+        Songs CSV file path, defaults to :meth:`paths.songs_csv_file_path`
+        (e.g. :meth:`paths.songs_delta_csv_file_path` to only retrieve the
+        songs delta).
+    shard
+        Roster shard, for the default songs CSV file path.
 
     Returns
     -------
@@ -115,7 +146,9 @@ def retrieve_songs_html_pages(force: bool = False) -> None:
     """
     print_table("SONGS HTML PAGES")
 
-    with paths.songs_csv_file_path().open("r") as songs_csv_file:
+    songs_csv_file_path = songs_csv_file_path or paths.songs_csv_file_path(shard)
+
+    with songs_csv_file_path.open("r") as songs_csv_file, WriteBehindWriter() as writer:
         reader = csv.DictReader(songs_csv_file)
 
         for song in map(lambda attributes: Song(**attributes), reader):
@@ -128,7 +161,7 @@ def retrieve_songs_html_pages(force: bool = False) -> None:
                 song_url = lyrics_com.song_url(song.song_path)
                 try:
                     song_html_page = fetch(song_url)
-                    song_html_file_path.write_text(song_html_page)
+                    writer.write_text(song_html_file_path, song_html_page)
                     print_table_entry(
                         song.song_title, "HTML page retrieved and saved.", LogLevel.INFO
                     )
@@ -139,3 +172,152 @@ def retrieve_songs_html_pages(force: bool = False) -> None:
                         f"Error in retrieving HTML page [{err.status_code}].",
                         LogLevel.ERROR,
                     )
+
+
+def enqueue_artists_html_pages_jobs(
+    queue: JobQueue, force: bool = False, shard: Shard = None
+) -> None:
+    """Enqueue jobs for retrieving artist HTML pages.
+
+    Parameters
+    ----------
+    queue
+        Job queue.
+    force
+        Overwrite HTML pages that have already been retrieved, and enqueue
+        again jobs that were already enqueued.
+    shard
+        Only enqueue the jobs of the artists of this roster shard.
+
+    Returns
+    -------
+    :code:`None`
+    """
+    print_table("ARTISTS HTML PAGES JOBS")
+
+    count = queue.enqueue(
+        ARTIST_JOB,
+        (
+            (artist, {"artist": artist, "force": force})
+            for artist in environment.get_artists(shard)
+        ),
+        reset=force,
+    )
+    print_table_entry("Artists", f"{count} jobs enqueued.", LogLevel.INFO)
+
+
+def enqueue_songs_html_pages_jobs(
+    queue: JobQueue, force: bool = False, shard: Shard = None
+) -> None:
+    """Enqueue jobs for retrieving song HTML pages of the songs CSV file.
+
+    Parameters
+    ----------
+    queue
+        Job queue.
+    force
+        Overwrite HTML pages that have already been retrieved, and enqueue
+        again jobs that were already enqueued.
+    shard
+        Only enqueue the jobs of the artists of this roster shard.
+
+    Returns
+    -------
+    :code:`None`
+    """
+    print_table("SONGS HTML PAGES JOBS")
+
+    with paths.songs_csv_file_path(shard).open("r") as songs_csv_file:
+        count = queue.enqueue(
+            SONG_JOB,
+            (
+                (attributes["song_path"], {"song": attributes, "force": force})
+                for attributes in csv.DictReader(songs_csv_file)
+            ),
+            reset=force,
+        )
+    print_table_entry("Songs", f"{count} jobs enqueued.", LogLevel.INFO)
+
+
+def work_html_pages_jobs(
+    queue: JobQueue,
+    worker_id: str = None,
+    kinds: Iterable[str] = None,
+    wait: bool = False,
+    poll_interval: float = 5,
+) -> None:
+    """Retrieve and save HTML pages by working through queued jobs.
+
+    Any number of workers, on any host sharing the data directory, can
+    work through the same queue concurrently.
+
+    Parameters
+    ----------
+    queue
+        Job queue.
+    worker_id
+        Worker identifier, defaults to "<hostname>:<pid>".
+    kinds
+        Job kinds to work on (:code:`"artist"` and/or :code:`"song"`),
+        defaults to all kinds.
+    wait
+        Keep polling for new jobs instead of returning once no job is
+        available.
+    poll_interval
+        Delay between polls when no job is available, in seconds.
+
+    Returns
+    -------
+    :code:`None`
+    """
+    print_table("HTML PAGES JOBS")
+
+    worker_id = worker_id or default_worker_id()
+
+    while True:
+        job = queue.lease(worker_id, kinds)
+        if job is None:
+            if not wait:
+                break
+            time.sleep(poll_interval)
+        else:
+            _work_html_page_job(queue, job)
+
+
+def _work_html_page_job(queue: JobQueue, job: Job) -> None:
+    if job.kind == ARTIST_JOB:
+        name = job.payload["artist"]
+        url = lyrics_com.artist_url(name)
+        html_file_path = paths.artist_html_file_path(name)
+    else:
+        song = Song(**job.payload["song"])
+        name = song.song_title
+        url = lyrics_com.song_url(song.song_path)
+        html_file_path = paths.song_html_file_path(song)
+
+    if html_file_path.exists() and not job.payload["force"]:
+        queue.complete(job)
+        print_table_entry(name, "HTML page already retrieved.", LogLevel.INFO)
+        return
+
+    try:
+        # Well below the visibility timeout, so the lease cannot expire (and
+        # the job be leased by another worker) while the page is fetched:
+        html_page = fetch(url, timeout=min(FETCH_TIMEOUT, queue.visibility_timeout / 4))
+    except CommunicationError as err:
+        # Only server side errors and rate limiting are worth retrying:
+        retry = err.status_code is None or err.status_code == 429
+        retry = retry or err.status_code >= 500
+        queue.fail(job, str(err), retry=retry)
+        print_table_entry(
+            name, f"Error in retrieving HTML page [{err.status_code}].", LogLevel.ERROR,
+        )
+    else:
+        if not queue.extend(job):
+            print_table_entry(name, "Lease lost, page discarded.", LogLevel.WARNING)
+            return
+        # Workers may still race on a job whose lease expired, hence the
+        # atomic write:
+        write_text_atomic(html_file_path, html_page)
+        queue.complete(job)
+        print_table_entry(name, "HTML page retrieved and saved.", LogLevel.INFO)
@@ -0,0 +1,134 @@
+"""
+Snapshot
+========
+
+This module provides methods for diffing an artist's song list against
+the snapshot persisted by the previous run.
+
+Snapshots are stored as one JSON file per artist, mapping each song path
+to its CSV row, so that refreshes only need to process the delta.
+
+A refresh saves pending snapshots, which are only committed (i.e. replace
+the artist snapshots) once the delta has been fully processed. If the
+refresh fails or is interrupted, the next one diffs against the same
+snapshots again and recovers the songs that were missed.
+"""
+
+# Standard Library ---------------------------------------------------------------------
+import json
+import os
+from typing import Dict, Iterable, List, NamedTuple
+
+# Project ------------------------------------------------------------------------------
+from lyrics_classifier import paths
+from lyrics_classifier.logger import LogLevel, print_table, print_table_entry
+
+
+class SongsDelta(NamedTuple):
+    """Songs added, changed and removed since the last snapshot."""
+
+    added: List[dict]
+    changed: List[dict]
+    removed: List[dict]
+
+
+def load_snapshot(artist: str) -> Dict[str, dict]:
+    """Load the artist's last snapshot.
+
+    Parameters
+    ----------
+    artist
+        Artist name.
+
+    Returns
+    -------
+    :code:`Dict[str, dict]`
+        Song CSV rows keyed by song path, empty if there is no snapshot.
+    """
+    artist_snapshot_file_path = paths.artist_snapshot_file_path(artist)
+
+    if not artist_snapshot_file_path.exists():
+        return {}
+
+    return json.loads(artist_snapshot_file_path.read_text())
+
+
+def save_snapshot(artist: str, rows: List[dict], pending: bool = False) -> None:
+    """Save the artist's snapshot.
+
+    The snapshot is written to a temporary file first and then renamed,
+    so that an interrupted run leaves the previous snapshot intact.
+
+    Parameters
+    ----------
+    artist
+        Artist name.
+    rows
+        Song CSV rows.
+    pending
+        Save a pending snapshot, to be committed with
+        :meth:`commit_snapshots`.
+
+    Returns
+    -------
+    :code:`None`
+    """
+    artist_snapshot_file_path = paths.artist_snapshot_file_path(artist, pending)
+    temporary_file_path = artist_snapshot_file_path.with_suffix(".json.tmp")
+
+    temporary_file_path.write_text(json.dumps({row["song_path"]: row for row in rows}))
+    os.replace(temporary_file_path, artist_snapshot_file_path)
+
+
+def diff_songs(snapshot: Dict[str, dict], rows: List[dict]) -> SongsDelta:
+    """Diff the artist's song CSV rows against their last snapshot.
+
+    Parameters
+    ----------
+    snapshot
+        Last snapshot, as returned by :meth:`load_snapshot`.
+    rows
+        Current song CSV rows.
+
+    Returns
+    -------
+    :code:`SongsDelta`
+        Songs added, changed and removed since the snapshot.
+    """
+    song_paths = {row["song_path"] for row in rows}
+
+    return SongsDelta(
+        added=[row for row in rows if row["song_path"] not in snapshot],
+        changed=[
+            row
+            for row in rows
+            if row["song_path"] in snapshot and snapshot[row["song_path"]] != row
+        ],
+        removed=[
+            row for song_path, row in snapshot.items() if song_path not in song_paths
+        ],
+    )
+
+
+def commit_snapshots(artists: Iterable[str]) -> None:
+    """Replace the artists' snapshots with their pending snapshots.
+
+    Meant to be called once the songs delta has been fully processed.
+    Artists without a pending snapshot are skipped.
+
+    Parameters
+    ----------
+    artists
+        Artist names.
+
+    Returns
+    -------
+    :code:`None`
+    """
+    print_table("SNAPSHOTS")
+
+    for artist in artists:
+        pending_file_path = paths.artist_snapshot_file_path(artist, pending=True)
+        if pending_file_path.exists():
+            os.replace(pending_file_path, paths.artist_snapshot_file_path(artist))
+            print_table_entry(artist, "Snapshot committed.", LogLevel.INFO)
@@ -7,21 +7,49 @@ This module provides utility methods for retrieving environment variables.
 
 # Standard Library ---------------------------------------------------------------------
 import os
-from typing import List
+from functools import lru_cache
+from typing import List, Tuple
 
 # Third Party --------------------------------------------------------------------------
 from dotenv import load_dotenv
 
+# Project ------------------------------------------------------------------------------
+from lyrics_classifier import paths, roster
+from lyrics_classifier.roster import Shard
+
 
 load_dotenv()
 
 
-def get_artists() -> List[str]:
+def get_artists(shard: Shard = None) -> List[str]:
     """Return list of artists.
 
+    Artists are read from the artist list file set in the `ARTISTS_FILE`
+    environment variable (relative to the project root) if any, and from
+    the comma separated `ARTISTS` environment variable otherwise (see
+    :mod:`roster`).
+
+    Parameters
+    ----------
+    shard
+        Only return the artists of this shard.
+
     Returns
     -------
     :code:`List[str]`
         List of artists.
     """
-    return os.getenv("ARTISTS").split(",")
+    return list(_get_artists(shard))
+
+
+@lru_cache(maxsize=None)
+def _get_artists(shard: Shard = None) -> Tuple[str, ...]:
+    if shard is not None:
+        return tuple(artist for artist in _get_artists() if shard.contains(artist))
+
+    artists_file = os.getenv("ARTISTS_FILE")
+    if artists_file:
+        roster_file_path = paths.project_root_path().joinpath(artists_file)
+        return tuple(artist.name for artist in roster.load_roster(roster_file_path))
+
+    return tuple(os.getenv("ARTISTS").split(","))
@@ -0,0 +1,376 @@
+"""
+Featurize
+=========
+
+This module provides methods for turning the extracted lyrics into
+hashed sparse feature matrices.
+
+Lyrics are streamed from the text files in batches and hashed into CSR
+matrices, so the corpus never needs to be held in memory. Each batch is
+saved to its own directory of uncompressed `.npy` files (`data`,
+`indices`, `indptr`, `labels` and `song_paths`) which can be memory-mapped
+on load. Rows are aligned with the songs CSV file at featurizing time
+(songs without lyrics are kept as empty rows) and record their song path,
+so they can be mapped back to songs after the songs CSV file changes.
+"""
+
+# Standard Library ---------------------------------------------------------------------
+import csv
+import itertools
+import json
+import re
+import shutil
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+# Data Science
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+
+# Project ------------------------------------------------------------------------------
+from lyrics_classifier import paths
+from lyrics_classifier.collect_data.process.song import Song
+from lyrics_classifier.logger import LogLevel, print_table, print_table_entry
+from lyrics_classifier.writer import write_text_atomic
+
+
+N_FEATURES = 2 ** 20
+BATCH_SIZE = 4096
+
+TOKEN_REGEX = re.compile(r"\w+(?:'\w+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split lyrics into lower case word tokens.
+
+    Parameters
+    ----------
+    text
+        Lyrics.
+
+    Returns
+    -------
+    :code:`List[str]`
+        Tokens.
+    """
+    return TOKEN_REGEX.findall(text.lower())
+
+
+def vectorizer(n_features: int = N_FEATURES) -> HashingVectorizer:
+    """Return the hashing vectorizer used for featurizing lyrics.
+
+    .. note::
+        The vectorizer is stateless, so the same configuration must be
+        used for training and prediction.
+
+    Parameters
+    ----------
+    n_features
+        Number of hashed features.
+
+    Returns
+    -------
+    :code:`HashingVectorizer`
+        Hashing vectorizer.
+    """
+    return HashingVectorizer(
+        n_features=n_features,
+        tokenizer=tokenize,
+        token_pattern=None,
+        lowercase=False,
+        alternate_sign=False,
+        norm="l2",
+        dtype=np.float32,
+    )
+
+
+def vectorizer_config(n_features: int = N_FEATURES) -> dict:
+    """Return the configuration of the hashing vectorizer, as JSON
+    serializable values.
+
+    Saved along trained models, so that loading them with a vectorizer
+    configured differently (e.g. another tokenizer or norm) can be
+    detected.
+
+    Parameters
+    ----------
+    n_features
+        Number of hashed features.
+
+    Returns
+    -------
+    :code:`dict`
+        Vectorizer parameters, plus the token regular expression.
+    """
+    config = {"token_regex": TOKEN_REGEX.pattern}
+    for name, value in vectorizer(n_features).get_params().items():
+        if callable(value) and not isinstance(value, type):
+            value = f"{value.__module__}.{value.__qualname__}"
+        elif isinstance(value, type):
+            value = np.dtype(value).str
+        elif isinstance(value, tuple):
+            value = list(value)
+        config[name] = value
+    return config
+
+
+def read_songs(songs_csv_file_path: Path = None) -> Iterator[Song]:
+    """Stream songs from the songs CSV file.
+
+    Parameters
+    ----------
+    songs_csv_file_path
+        Songs CSV file path, defaults to :meth:`paths.songs_csv_file_path`.
+
+    Returns
+    -------
+    :code:`Iterator[Song]`
+        Songs, in file order.
+    """
+    songs_csv_file_path = songs_csv_file_path or paths.songs_csv_file_path()
+
+    with songs_csv_file_path.open("r") as songs_csv_file:
+        reader = csv.DictReader(songs_csv_file)
+        yield from map(lambda attributes: Song(**attributes), reader)
+
+
+def batched(iterable: Iterable, batch_size: int) -> Iterator[List]:
+    """Split an iterable into lists of at most `batch_size` elements.
+
+    Parameters
+    ----------
+    iterable
+        Iterable.
+    batch_size
+        Batch size.
+
+    Returns
+    -------
+    :code:`Iterator[List]`
+        Batches.
+    """
+    iterator = iter(iterable)
+    batch = list(itertools.islice(iterator, batch_size))
+    while batch:
+        yield batch
+        batch = list(itertools.islice(iterator, batch_size))
+
+
+def featurize_lyrics(
+    batch_size: int = BATCH_SIZE, n_features: int = N_FEATURES, processes: int = 1
+) -> None:
+    """Featurize the extracted lyrics of all the songs in the songs CSV file.
+
+    The manifest is removed first and written last, so the feature store
+    is never seen with batches from different runs: after an interrupted
+    run, there is no manifest and the lyrics need to be featurized again.
+
+    .. warning::
+        This function will overwrite existing data.
+
+    Parameters
+    ----------
+    batch_size
+        Number of songs per batch.
+    n_features
+        Number of hashed features.
+    processes
+        Number of worker processes, :code:`None` uses all the CPUs.
+
+    Returns
+    -------
+    :code:`None`
+    """
+    print_table("FEATURES")
+
+    paths.features_manifest_file_path().unlink(missing_ok=True)
+    for batch_dir_path in paths.features_dir_path().glob("batch_*"):
+        shutil.rmtree(batch_dir_path)
+
+    classes: Dict[str, int] = {}
+    batches = []
+
+    tasks = ((songs, n_features) for songs in batched(read_songs(), batch_size))
+
+    pool = Pool(processes) if processes != 1 else None
+    try:
+        mapper = pool.imap if pool else map
+        for i, (features, artists, song_paths, missing) in enumerate(
+            mapper(_featurize_batch, tasks)
+        ):
+            labels = np.fromiter(
+                (classes.setdefault(artist, len(classes)) for artist in artists),
+                dtype=np.int32,
+                count=len(artists),
+            )
+            batch_name = f"batch_{i:05d}"
+            save_batch(
+                paths.features_dir_path().joinpath(batch_name),
+                features,
+                labels,
+                np.array(song_paths, dtype=str),
+            )
+            batches.append(
+                {"name": batch_name, "n_samples": len(labels), "nnz": features.nnz}
+            )
+
+            if missing:
+                print_table_entry(
+                    batch_name, f"{missing} songs without lyrics.", LogLevel.WARNING
+                )
+            print_table_entry(
+                batch_name, f"{len(labels)} songs featurized.", LogLevel.INFO
+            )
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    manifest = {
+        "n_features": n_features,
+        "n_samples": sum(batch["n_samples"] for batch in batches),
+        "classes": list(classes),
+        "batches": batches,
+    }
+    write_text_atomic(
+        paths.features_manifest_file_path(), json.dumps(manifest, indent=2)
+    )
+
+
+def _featurize_batch(
+    task: Tuple[List[Song], int]
+) -> Tuple[sparse.csr_matrix, List[str], List[str], int]:
+    songs, n_features = task
+
+    lyrics = []
+    missing = 0
+    for song in songs:
+        lyrics_text_file_path = paths.lyrics_text_file_path(song)
+        if lyrics_text_file_path.exists():
+            lyrics.append(lyrics_text_file_path.read_text())
+        else:
+            lyrics.append("")
+            missing += 1
+
+    features = vectorizer(n_features).transform(lyrics)
+
+    return (
+        features,
+        [song.artist for song in songs],
+        [song.song_path for song in songs],
+        missing,
+    )
+
+
+def save_batch(
+    batch_dir_path: Path,
+    features: sparse.csr_matrix,
+    labels: np.ndarray,
+    song_paths: np.ndarray = None,
+) -> None:
+    """Save a batch of features and labels as memory-mappable arrays.
+
+    Parameters
+    ----------
+    batch_dir_path
+        Batch directory path.
+    features
+        CSR feature matrix.
+    labels
+        Label vector.
+    song_paths
+        Song path of each row.
+
+    Returns
+    -------
+    :code:`None`
+    """
+    batch_dir_path.mkdir(exist_ok=True)
+    np.save(batch_dir_path.joinpath("data.npy"), features.data)
+    np.save(batch_dir_path.joinpath("indices.npy"), features.indices)
+    np.save(batch_dir_path.joinpath("indptr.npy"), features.indptr)
+    np.save(batch_dir_path.joinpath("labels.npy"), labels)
+    if song_paths is not None:
+        np.save(batch_dir_path.joinpath("song_paths.npy"), song_paths)
+
+
+def load_manifest() -> dict:
+    """Load the features manifest.
+
+    Returns
+    -------
+    :code:`dict`
+        Features manifest, with the number of features, the classes and
+        the list of batches.
+    """
+    return json.loads(paths.features_manifest_file_path().read_text())
+
+
+def load_batch(
+    batch_name: str, n_features: int, mmap: bool = True
+) -> Tuple[sparse.csr_matrix, np.ndarray]:
+    """Load a batch of features and labels.
+
+    Parameters
+    ----------
+    batch_name
+        Batch name, as listed in the features manifest.
+    n_features
+        Number of hashed features.
+    mmap
+        Memory-map the arrays instead of reading them into memory.
+
+    Returns
+    -------
+    :code:`Tuple[sparse.csr_matrix, np.ndarray]`
+        CSR feature matrix and label vector.
+    """
+    batch_dir_path = paths.features_dir_path().joinpath(batch_name)
+    mmap_mode = "r" if mmap else None
+
+    data, indices, indptr, labels = (
+        np.load(batch_dir_path.joinpath(f"{name}.npy"), mmap_mode=mmap_mode)
+        for name in ("data", "indices", "indptr", "labels")
+    )
+    features = sparse.csr_matrix(
+        (data, indices, indptr), shape=(len(indptr) - 1, n_features), copy=False
+    )
+
+    return features, labels
+
+
+def iter_batches(mmap: bool = True) -> Iterator[Tuple[sparse.csr_matrix, np.ndarray]]:
+    """Stream all the batches of the feature store.
+
+    Parameters
+    ----------
+    mmap
+        Memory-map the arrays instead of reading them into memory.
+
+    Returns
+    -------
+    :code:`Iterator[Tuple[sparse.csr_matrix, np.ndarray]]`
+        CSR feature matrices and label vectors, in songs CSV order.
+    """
+    manifest = load_manifest()
+    for batch in manifest["batches"]:
+        yield load_batch(batch["name"], manifest["n_features"], mmap)
+
+
+def load_song_paths() -> np.ndarray:
+    """Load the song path of each row of the feature store.
+
+    Returns
+    -------
+    :code:`np.ndarray`
+        Song paths, in feature store row order.
+    """
+    return np.concatenate(
+        [
+            np.load(paths.features_dir_path().joinpath(batch["name"], "song_paths.npy"))
+            for batch in load_manifest()["batches"]
+        ]
+        or [np.empty(0, dtype=str)]
+    )
@@ -0,0 +1,24 @@
+"""
+Featurize
+=========
+
+This script featurizes the extracted lyrics into the feature store.
+"""
+# Standard Library ---------------------------------------------------------------------
+import argparse
+
+# Project ------------------------------------------------------------------------------
+from lyrics_classifier import featurize
+
+
+parser = argparse.ArgumentParser(prog="python -m lyrics_classifier.featurize")
+parser.add_argument("--batch-size", type=int, default=featurize.BATCH_SIZE)
+parser.add_argument("--n-features", type=int, default=featurize.N_FEATURES)
+parser.add_argument(
+    "--processes", type=int, default=1, help="Number of worker processes."
+)
+args = parser.parse_args()
+
+featurize.featurize_lyrics(
+    batch_size=args.batch_size, n_features=args.n_features, processes=args.processes
+)
@@ -0,0 +1,512 @@
+"""
+Index
+=====
+
+This module provides methods for building and querying an inverted index
+of the extracted lyrics.
+
+The index is made of immutable segments, each holding:
+
+- :code:`terms.txt`: the sorted term dictionary, one term per line.
+- :code:`offsets.npy`: the offsets of each term's postings and
+  positions.
+- :code:`postings.bin`: varint encoded postings; for each term, the
+  document id deltas.
+- :code:`positions.bin`: varint encoded positions; for each term, the
+  term frequency in each document followed by the position deltas in
+  each document.
+- :code:`docs.jsonl`: the indexed documents (songs).
+
+A manifest lists the segments and the deleted documents. Updating the
+index only indexes new or modified lyrics into a new segment, and marks
+the documents they replace (or whose lyrics disappeared) as deleted.
+Rebuilding compacts everything into fresh segments.
+
+Postings and positions are kept in separate streams, so that term
+clauses only decode document ids; positions are only decoded for phrase
+clauses, and only for the documents containing all the phrase terms.
+"""
+
+# Standard Library ---------------------------------------------------------------------
+import json
+import mmap
+import re
+import shutil
+from bisect import bisect_left
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, List, Set, Tuple, Union
+
+# Data Science
+import numpy as np
+
+# Project ------------------------------------------------------------------------------
+from lyrics_classifier import paths
+from lyrics_classifier.featurize import read_songs, tokenize
+from lyrics_classifier.logger import LogLevel, print_table, print_table_entry
+from lyrics_classifier.writer import write_text_atomic
+
+
+INDEX_VERSION = 2
+SEGMENT_SIZE = 50000
+
+QUERY_REGEX = re.compile(r'(-?)(?:"([^"]*)"|(\S+))')
+
+Postings = Dict[int, np.ndarray]
+
+
+def update_index(rebuild: bool = False, segment_size: int = SEGMENT_SIZE) -> None:
+    """Index the lyrics added or modified since the last update.
+
+    Lyrics are listed from the songs CSV file. Lyrics which are new or
+    whose file was modified are indexed in new segments, holding at most
+    `segment_size` documents each; documents whose lyrics were modified
+    or removed are marked as deleted.
+
+    Parameters
+    ----------
+    rebuild
+        Discard the existing index and index all the lyrics again.
+    segment_size
+        Maximum number of documents per segment, bounding memory usage.
+
+    Returns
+    -------
+    :code:`None`
+    """
+    print_table("LYRICS INDEX")
+
+    if rebuild:
+        for segment_dir_path in paths.index_dir_path().glob("segment_*"):
+            shutil.rmtree(segment_dir_path)
+        manifest_file_path().unlink(missing_ok=True)
+
+    manifest = load_manifest()
+    deleted = set(manifest["deleted"])
+    indexed = {
+        doc["path"]: doc
+        for segment in manifest["segments"]
+        for doc in _read_docs(paths.index_dir_path().joinpath(segment))
+        if doc["id"] not in deleted
+    }
+
+    lyrics_dir_path = paths.lyrics_dir_path()
+    seen = set()
+    docs = []
+
+    for song in read_songs():
+        lyrics_text_file_path = paths.lyrics_text_file_path(song)
+        relative_path = str(lyrics_text_file_path.relative_to(lyrics_dir_path))
+        if relative_path in seen or not lyrics_text_file_path.exists():
+            continue
+        seen.add(relative_path)
+
+        mtime_ns = lyrics_text_file_path.stat().st_mtime_ns
+        doc = indexed.get(relative_path)
+        if doc and doc["mtime_ns"] == mtime_ns:
+            continue
+        if doc:
+            deleted.add(doc["id"])
+
+        docs.append(
+            {
+                "id": manifest["next_doc_id"],
+                "artist": song.artist,
+                "song_title": song.song_title,
+                "path": relative_path,
+                "mtime_ns": mtime_ns,
+            }
+        )
+        manifest["next_doc_id"] += 1
+
+        if len(docs) == segment_size:
+            _add_segment(manifest, docs)
+            docs = []
+
+    if docs:
+        _add_segment(manifest, docs)
+
+    removed = [doc["id"] for path, doc in indexed.items() if path not in seen]
+    deleted.update(removed)
+    manifest["deleted"] = sorted(deleted)
+
+    write_text_atomic(manifest_file_path(), json.dumps(manifest))
+
+    print_table_entry(
+        "Documents", f"{len(removed)} removed from the index.", LogLevel.INFO
+    )
+
+
+def manifest_file_path() -> Path:
+    """Return the index manifest JSON file path.
+
+    Returns
+    -------
+    :code:`Path`
+        Index manifest JSON file path.
+    """
+    return paths.index_dir_path().joinpath("manifest.json")
+
+
+def load_manifest() -> dict:
+    """Load the index manifest.
+
+    Returns
+    -------
+    :code:`dict`
+        Index manifest, empty if the index has not been built yet.
+    """
+    if not manifest_file_path().exists():
+        return {
+            "version": INDEX_VERSION,
+            "segments": [],
+            "deleted": [],
+            "next_doc_id": 0,
+            "next_segment_id": 0,
+        }
+
+    manifest = json.loads(manifest_file_path().read_text())
+    if manifest["version"] != INDEX_VERSION:
+        raise ValueError(
+            f"Unsupported index version {manifest['version']}, rebuild the index."
+        )
+    return manifest
+
+
+def _add_segment(manifest: dict, docs: List[dict]) -> None:
+    segment = f"segment_{manifest['next_segment_id']:05d}"
+    manifest["next_segment_id"] += 1
+
+    postings: Dict[str, List[Tuple[int, List[int]]]] = defaultdict(list)
+    for doc in docs:
+        lyrics = paths.lyrics_dir_path().joinpath(doc["path"]).read_text()
+        positions = defaultdict(list)
+        for position, term in enumerate(tokenize(lyrics)):
+            positions[term].append(position)
+        for term, term_positions in positions.items():
+            postings[term].append((doc["id"], term_positions))
+
+    _write_segment(paths.index_dir_path().joinpath(segment), postings, docs)
+    manifest["segments"].append(segment)
+
+    print_table_entry(
+        segment, f"{len(docs)} documents, {len(postings)} terms.", LogLevel.INFO
+    )
+
+
+def _write_segment(
+    segment_dir_path: Path,
+    postings: Dict[str, List[Tuple[int, List[int]]]],
+    docs: List[dict],
+) -> None:
+    terms = sorted(postings)
+    # Postings and positions offsets of each term, in two columns:
+    offsets = np.zeros((len(terms) + 1, 2), dtype=np.uint64)
+    postings_buffer = bytearray()
+    positions_buffer = bytearray()
+
+    for i, term in enumerate(terms):
+        # Documents are appended in increasing id order:
+        previous_doc_id = 0
+        for doc_id, positions in postings[term]:
+            _encode_varint(doc_id - previous_doc_id, postings_buffer)
+            _encode_varint(len(positions), positions_buffer)
+            previous_doc_id = doc_id
+        for _, positions in postings[term]:
+            previous_position = 0
+            for position in positions:
+                _encode_varint(position - previous_position, positions_buffer)
+                previous_position = position
+        offsets[i + 1] = len(postings_buffer), len(positions_buffer)
+
+    # Left over by an interrupted update, which never made it to the manifest:
+    if segment_dir_path.exists():
+        shutil.rmtree(segment_dir_path)
+    segment_dir_path.mkdir()
+    segment_dir_path.joinpath("terms.txt").write_text("\n".join(terms))
+    np.save(segment_dir_path.joinpath("offsets.npy"), offsets)
+    segment_dir_path.joinpath("postings.bin").write_bytes(bytes(postings_buffer))
+    segment_dir_path.joinpath("positions.bin").write_bytes(bytes(positions_buffer))
+    segment_dir_path.joinpath("docs.jsonl").write_text(
+        "".join(json.dumps(doc) + "\n" for doc in docs)
+    )
+
+
+def _read_docs(segment_dir_path: Path) -> Iterator[dict]:
+    with segment_dir_path.joinpath("docs.jsonl").open("r") as docs_file:
+        yield from map(json.loads, docs_file)
+
+
+def _encode_varint(value: int, buffer: bytearray) -> None:
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _decode_varints(data: bytes) -> np.ndarray:
+    data = np.frombuffer(data, dtype=np.uint8)
+    if data.size == 0:
+        return np.empty(0, dtype=np.int64)
+
+    # Each value ends with the first byte without the continuation bit:
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    shifts = 7 * (np.arange(len(data)) - np.repeat(starts, ends - starts + 1))
+    groups = (data & 0x7F).astype(np.int64) << shifts
+    return np.add.reduceat(groups, starts)
+
+
+def _map_file(file_path: Path) -> Union[mmap.mmap, bytes]:
+    if not file_path.stat().st_size:
+        return b""
+    with file_path.open("rb") as file:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class Segment:
+    """Read-only index segment, with memory-mapped postings.
+
+    Parameters
+    ----------
+    segment_dir_path
+        Segment directory path.
+    """
+
+    def __init__(self, segment_dir_path: Path) -> None:
+        self.terms = segment_dir_path.joinpath("terms.txt").read_text().split("\n")
+        self.offsets = np.load(segment_dir_path.joinpath("offsets.npy"), mmap_mode="r")
+        self.docs = {doc["id"]: doc for doc in _read_docs(segment_dir_path)}
+        self.postings = _map_file(segment_dir_path.joinpath("postings.bin"))
+        self.positions = _map_file(segment_dir_path.joinpath("positions.bin"))
+
+    def term_doc_ids(self, term: str) -> np.ndarray:
+        """Return the ids of the documents containing a term.
+
+        Parameters
+        ----------
+        term
+            Term.
+
+        Returns
+        -------
+        :code:`np.ndarray`
+            Sorted document ids.
+        """
+        i = self._term_index(term)
+        if i is None:
+            return np.empty(0, dtype=np.int64)
+
+        start, end = self.offsets[i, 0], self.offsets[i + 1, 0]
+        return np.cumsum(_decode_varints(self.postings[int(start) : int(end)]))
+
+    def term_postings(self, term: str, doc_ids: Set[int] = None) -> Postings:
+        """Return the postings of a term.
+
+        Parameters
+        ----------
+        term
+            Term.
+        doc_ids
+            Only return the positions in these documents.
+
+        Returns
+        -------
+        :code:`Postings`
+            Term positions keyed by document id.
+        """
+        i = self._term_index(term)
+        if i is None:
+            return {}
+
+        term_doc_ids = self.term_doc_ids(term)
+        start, end = self.offsets[i, 1], self.offsets[i + 1, 1]
+        varints = _decode_varints(self.positions[int(start) : int(end)])
+        frequencies, deltas = np.split(varints, [len(term_doc_ids)])
+
+        # Position deltas restart from zero in each document:
+        ends = np.cumsum(frequencies)
+        positions = np.cumsum(deltas)
+        positions -= np.repeat(
+            np.concatenate([[0], positions[ends[:-1] - 1]]), frequencies
+        )
+
+        starts = ends - frequencies
+        return {
+            int(doc_id): positions[start:end]
+            for doc_id, start, end in zip(term_doc_ids, starts, ends)
+            if doc_ids is None or doc_id in doc_ids
+        }
+
+    def _term_index(self, term: str) -> int:
+        i = bisect_left(self.terms, term)
+        if i == len(self.terms) or self.terms[i] != term:
+            return None
+        return i
+
+
+class Index:
+    """Lyrics inverted index, opened for querying.
+
+    Queries are made of whitespace separated clauses, all of which must
+    match:
+
+    - :code:`term` matches lyrics containing the term.
+    - :code:`"some phrase"` matches lyrics containing the exact phrase.
+    - :code:`-term` or :code:`-"some phrase"` excludes matching lyrics.
+    - :code:`OR` separates alternative groups of clauses.
+    """
+
+    def __init__(self) -> None:
+        manifest = load_manifest()
+        self.deleted = set(manifest["deleted"])
+        self.segments = [
+            Segment(paths.index_dir_path().joinpath(segment))
+            for segment in manifest["segments"]
+        ]
+        self.doc_ids = {
+            doc_id
+            for segment in self.segments
+            for doc_id in segment.docs
+            if doc_id not in self.deleted
+        }
+
+    def term_doc_ids(self, term: str) -> Set[int]:
+        """Return the ids of the documents containing a term, without
+        deleted documents.
+
+        Parameters
+        ----------
+        term
+            Term.
+
+        Returns
+        -------
+        :code:`Set[int]`
+            Document ids.
+        """
+        doc_ids = set()
+        for segment in self.segments:
+            doc_ids.update(segment.term_doc_ids(term).tolist())
+        return doc_ids - self.deleted
+
+    def term_postings(self, term: str, doc_ids: Set[int] = None) -> Postings:
+        """Return the postings of a term across segments, without deleted
+        documents.
+
+        Parameters
+        ----------
+        term
+            Term.
+        doc_ids
+            Only return the positions in these documents.
+
+        Returns
+        -------
+        :code:`Postings`
+            Term positions keyed by document id.
+        """
+        postings = {}
+        for segment in self.segments:
+            postings.update(segment.term_postings(term, doc_ids))
+        return {
+            doc_id: positions
+            for doc_id, positions in postings.items()
+            if doc_id not in self.deleted
+        }
+
+    def phrase_doc_ids(self, phrase: str) -> Set[int]:
+        """Return the ids of the documents containing a phrase.
+
+        Parameters
+        ----------
+        phrase
+            Phrase (or single term).
+
+        Returns
+        -------
+        :code:`Set[int]`
+            Document ids.
+        """
+        terms = tokenize(phrase)
+        if not terms:
+            return set()
+
+        doc_ids = set.intersection(*(self.term_doc_ids(term) for term in terms))
+        if len(terms) == 1 or not doc_ids:
+            return doc_ids
+
+        postings = [self.term_postings(term, doc_ids) for term in terms]
+        return {
+            doc_id
+            for doc_id in doc_ids
+            if _contains_phrase([term_postings[doc_id] for term_postings in postings])
+        }
+
+    def search(self, query: str) -> List[dict]:
+        """Search the index.
+
+        Parameters
+        ----------
+        query
+            Query, see :class:`Index`.
+
+        Returns
+        -------
+        :code:`List[dict]`
+            Matching documents, with "artist", "song_title" and "path"
+            (relative to the lyrics directory).
+        """
+        doc_ids = set()
+        for group in _split_query(query):
+            group_doc_ids = None
+            excluded = set()
+            for negated, phrase in group:
+                if negated:
+                    excluded |= self.phrase_doc_ids(phrase)
+                elif group_doc_ids is None:
+                    group_doc_ids = self.phrase_doc_ids(phrase)
+                else:
+                    group_doc_ids &= self.phrase_doc_ids(phrase)
+            # Groups made only of exclusions match every other document:
+            if group_doc_ids is None:
+                group_doc_ids = set(self.doc_ids)
+            doc_ids |= group_doc_ids - excluded
+
+        return [self.doc(doc_id) for doc_id in sorted(doc_ids)]
+
+    def doc(self, doc_id: int) -> dict:
+        """Return an indexed document.
+
+        Parameters
+        ----------
+        doc_id
+            Document id.
+
+        Returns
+        -------
+        :code:`dict`
+            Document.
+        """
+        for segment in self.segments:
+            if doc_id in segment.docs:
+                return segment.docs[doc_id]
+        raise KeyError(doc_id)
+
+
+def _split_query(query: str) -> List[List[Tuple[bool, str]]]:
+    groups = [[]]
+    for negation, phrase, term in QUERY_REGEX.findall(query):
+        if term == "OR" and not negation:
+            groups.append([])
+        else:
+            groups[-1].append((bool(negation), phrase or term))
+    return [group for group in groups if group]
+
+
+def _contains_phrase(positions: List[np.ndarray]) -> bool:
+    # Phrase start positions, narrowed down term after term:
+    starts = positions[0]
+    for i, term_positions in enumerate(positions[1:], start=1):
+        starts = np.intersect1d(starts, term_positions - i, assume_unique=True)
+    return bool(len(starts))
@@ -0,0 +1,47 @@
+"""
+Index
+=====
+
+This script builds and queries the lyrics inverted index.
+
+- :code:`update` indexes lyrics added or modified since the last update
+  (:code:`--rebuild` indexes everything again into compacted segments).
+- :code:`search QUERY` lists the songs matching the query, e.g.
+  :code:`'"rising sun" -house OR moon'`.
+"""
+# Standard Library ---------------------------------------------------------------------
+import argparse
+import time
+
+# Project ------------------------------------------------------------------------------
+from lyrics_classifier import index
+from lyrics_classifier.logger import LogLevel, print_table, print_table_entry
+
+
+parser = argparse.ArgumentParser(prog="python -m lyrics_classifier.index")
+subparsers = parser.add_subparsers(dest="command", required=True)
+
+update_parser = subparsers.add_parser("update")
+update_parser.add_argument("--rebuild", action="store_true")
+update_parser.add_argument("--segment-size", type=int, default=index.SEGMENT_SIZE)
+
+search_parser = subparsers.add_parser("search")
+search_parser.add_argument("query")
+search_parser.add_argument("--limit", type=int, default=20)
+
+args = parser.parse_args()
+
+if args.command == "update":
+    index.update_index(rebuild=args.rebuild, segment_size=args.segment_size)
+elif args.command == "search":
+    lyrics_index = index.Index()
+    start = time.perf_counter()
+    docs = lyrics_index.search(args.query)
+    elapsed = time.perf_counter() - start
+
+    print_table(f"SEARCH: {args.query}")
+    for doc in docs[: args.limit]:
+        print_table_entry(doc["artist"], doc["song_title"], LogLevel.INFO)
+    print_table_entry(
+        "Matches", f"{len(docs)} songs in {elapsed * 1000:.1f} ms.", LogLevel.INFO
+    )
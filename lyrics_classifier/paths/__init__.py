@@ -15,6 +15,7 @@ from dotenv import load_dotenv
 
 # Project ------------------------------------------------------------------------------
 from lyrics_classifier.collect_data.process.song import Song
+from lyrics_classifier.roster import Shard
 
 
 load_dotenv()
@@ -145,15 +146,66 @@ def lyrics_text_file_path(song) -> Path:
     return artist_lyrics_dir_path(song.artist).joinpath(f"{song_file_name}.txt")
 
 
-def songs_csv_file_path() -> Path:
+def songs_csv_file_path(shard: Shard = None) -> Path:
     """Return absolute songs CSV file path.
 
+    Parameters
+    ----------
+    shard
+        Roster shard, each shard has its own songs CSV file (e.g.
+        `songs.shard-0-of-4.csv`).
+
     Returns
     -------
     :code:`Path`
         Songs CSV file path.
     """
-    return data_dir_path().joinpath("songs.csv")
+    return data_dir_path().joinpath(_sharded_file_name("songs.csv", shard))
+
+
+def songs_delta_csv_file_path(shard: Shard = None) -> Path:
+    """Return absolute songs delta CSV file path.
+
+    The songs delta CSV file contains the songs added or changed since
+    the last artist snapshots.
+
+    Parameters
+    ----------
+    shard
+        Roster shard, each shard has its own songs delta CSV file.
+
+    Returns
+    -------
+    :code:`Path`
+        Songs delta CSV file path.
+    """
+    return data_dir_path().joinpath(_sharded_file_name("songs_delta.csv", shard))
+
+
+def songs_removed_csv_file_path(shard: Shard = None) -> Path:
+    """Return absolute removed songs CSV file path.
+
+    The removed songs CSV file contains the songs removed since the last
+    artist snapshots.
+
+    Parameters
+    ----------
+    shard
+        Roster shard, each shard has its own removed songs CSV file.
+
+    Returns
+    -------
+    :code:`Path`
+        Removed songs CSV file path.
+    """
+    return data_dir_path().joinpath(_sharded_file_name("songs_removed.csv", shard))
+
+
+def _sharded_file_name(file_name: str, shard: Shard = None) -> str:
+    if shard is None:
+        return file_name
+    stem, suffix = os.path.splitext(file_name)
+    return f"{stem}.shard-{shard.index}-of-{shard.count}{suffix}"
 
 
 def songs_dir_path() -> Path:
@@ -208,3 +260,152 @@ def song_html_file_path(song: Song) -> Path:
     """
     song_file_name = re.sub(r"[\s/]", "_", song.song_title)
     return artist_songs_dir_path(song.artist).joinpath(f"{song_file_name}.html")
+
+
+def features_dir_path() -> Path:
+    """Return absolute features directory path.
+
+    The directory name is retrieved from the environment variables and
+    created if it does not yet exist.
+
+    Returns
+    -------
+    :code:`Path`
+        Absolute features directory path.
+    """
+    path = data_dir_path().joinpath(os.getenv("FEATURES_DIR"))
+    path.mkdir(exist_ok=True)
+    return path
+
+
+def features_manifest_file_path() -> Path:
+    """Return absolute features manifest JSON file path.
+
+    Returns
+    -------
+    :code:`Path`
+        Absolute features manifest JSON file path.
+    """
+    return features_dir_path().joinpath("manifest.json")
+
+
+def models_dir_path() -> Path:
+    """Return absolute models directory path.
+
+    The directory name is retrieved from the environment variables and
+    created if it does not yet exist.
+
+    Returns
+    -------
+    :code:`Path`
+        Absolute models directory path.
+    """
+    path = data_dir_path().joinpath(os.getenv("MODELS_DIR"))
+    path.mkdir(exist_ok=True)
+    return path
+
+
+def model_dir_path() -> Path:
+    """Return absolute artist classifier model artifact directory path.
+
+    Returns
+    -------
+    :code:`Path`
+        Absolute artist classifier model artifact directory path.
+    """
+    return models_dir_path().joinpath("artist_classifier")
+
+
+def jobs_db_file_path() -> Path:
+    """Return absolute jobs queue SQLite database file path.
+
+    Returns
+    -------
+    :code:`Path`
+        Absolute jobs queue SQLite database file path.
+    """
+    return data_dir_path().joinpath("jobs.sqlite3")
+
+
+def snapshots_dir_path() -> Path:
+    """Return absolute artist snapshots directory path.
+
+    The directory name is retrieved from the environment variables and
+    created if it does not yet exist.
+
+    Returns
+    -------
+    :code:`Path`
+        Absolute artist snapshots directory path.
+    """
+    path = data_dir_path().joinpath(os.getenv("SNAPSHOTS_DIR"))
+    path.mkdir(exist_ok=True)
+    return path
+
+
+def pending_snapshots_dir_path() -> Path:
+    """Return absolute pending artist snapshots directory path.
+
+    Pending snapshots are saved by a refresh and only replace the artist
+    snapshots once the refresh has completed.
+
+    Returns
+    -------
+    :code:`Path`
+        Absolute pending artist snapshots directory path.
+    """
+    path = snapshots_dir_path().joinpath("pending")
+    path.mkdir(exist_ok=True)
+    return path
+
+
+def artist_snapshot_file_path(artist: str, pending: bool = False) -> Path:
+    """Return absolute artist snapshot JSON file path.
+
+    Parameters
+    ----------
+    artist
+        Artist name.
+    pending
+        Return the artist's pending snapshot file path instead.
+
+    Returns
+    -------
+    :code:`Path`
+        Absolute artist snapshot JSON file path.
+    """
+    artist_file_name = re.sub(r"[\s/]", "_", artist)
+    dir_path = pending_snapshots_dir_path() if pending else snapshots_dir_path()
+    return dir_path.joinpath(f"{artist_file_name}.json")
+
+
+def index_dir_path() -> Path:
+    """Return absolute lyrics inverted index directory path.
+
+    The directory name is retrieved from the environment variables and
+    created if it does not yet exist.
+
+    Returns
+    -------
+    :code:`Path`
+        Absolute lyrics inverted index directory path.
+    """
+    path = data_dir_path().joinpath(os.getenv("INDEX_DIR"))
+    path.mkdir(exist_ok=True)
+    return path
+
+
+def similarity_dir_path() -> Path:
+    """Return absolute similarity directory path.
+
+    The directory name is retrieved from the environment variables and
+    created if it does not yet exist.
+
+    Returns
+    -------
+    :code:`Path`
+        Absolute similarity directory path.
+    """
+    path = data_dir_path().joinpath(os.getenv("SIMILARITY_DIR"))
+    path.mkdir(exist_ok=True)
+    return path
@@ -0,0 +1,300 @@
+"""
+Predict
+=======
+
+This module provides methods for classifying lyrics with the trained
+artist classifier.
+
+The model and vectorizer are loaded once by :class:`Predictor`, which
+also keeps an LRU cache of predictions keyed by a hash of the lyrics.
+:class:`MicroBatcher` groups concurrent requests into a single
+vectorized prediction call and records their latencies.
+"""
+
+# Standard Library ---------------------------------------------------------------------
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+# Data Science
+import numpy as np
+
+# Project ------------------------------------------------------------------------------
+from lyrics_classifier import featurize, train
+
+
+CACHE_SIZE = 65536
+MAX_BATCH_SIZE = 256
+MAX_BATCH_DELAY = 0.005
+
+
+class Predictor:
+    """Artist classifier warm-loaded for repeated predictions.
+
+    Parameters
+    ----------
+    cache_size
+        Maximum number of cached predictions.
+    """
+
+    def __init__(self, cache_size: int = CACHE_SIZE) -> None:
+        self.classifier, self.classes, n_features = train.load_model()
+        self.vectorizer = featurize.vectorizer(n_features)
+        self.cache_size = cache_size
+        self.cache: "OrderedDict[bytes, str]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def predict(self, lyrics: List[str]) -> List[str]:
+        """Predict artists for a batch of lyrics.
+
+        Cached lyrics are answered directly, the others are vectorized
+        and classified in a single call.
+
+        Parameters
+        ----------
+        lyrics
+            Batch of lyrics.
+
+        Returns
+        -------
+        :code:`List[str]`
+            Predicted artists.
+        """
+        keys = [lyrics_hash(text) for text in lyrics]
+        artists = [self._cache_get(key) for key in keys]
+
+        misses = [i for i, artist in enumerate(artists) if artist is None]
+        self.cache_hits += len(lyrics) - len(misses)
+        self.cache_misses += len(misses)
+
+        if misses:
+            features = self.vectorizer.transform([lyrics[i] for i in misses])
+            for i, label in zip(misses, self.classifier.predict(features)):
+                artists[i] = self.classes[label]
+                self._cache_set(keys[i], artists[i])
+
+        return artists
+
+    def _cache_get(self, key: bytes) -> str:
+        artist = self.cache.get(key)
+        if artist is not None:
+            self.cache.move_to_end(key)
+        return artist
+
+    def _cache_set(self, key: bytes, artist: str) -> None:
+        self.cache[key] = artist
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+
+class RollingPercentiles:
+    """Rolling window of recorded values, e.g. request latencies.
+
+    Parameters
+    ----------
+    window
+        Number of most recent values kept.
+    """
+
+    def __init__(self, window: int = 10000) -> None:
+        self.values = deque(maxlen=window)
+
+    def record(self, value: float) -> None:
+        """Record a value.
+
+        Parameters
+        ----------
+        value
+            Value.
+
+        Returns
+        -------
+        :code:`None`
+        """
+        self.values.append(value)
+
+    def percentiles(
+        self, percentiles: Iterable[float] = (50, 90, 99)
+    ) -> Dict[str, float]:
+        """Return percentiles over the window.
+
+        Parameters
+        ----------
+        percentiles
+            Percentiles to compute.
+
+        Returns
+        -------
+        :code:`Dict[str, float]`
+            Values keyed by percentile (e.g. "p99").
+        """
+        percentiles = list(percentiles)
+        if not self.values:
+            return {f"p{percentile:g}": float("nan") for percentile in percentiles}
+
+        values = np.percentile(np.fromiter(self.values, dtype=float), percentiles)
+        return {
+            f"p{percentile:g}": float(value)
+            for percentile, value in zip(percentiles, values)
+        }
+
+
+class ServingStats(NamedTuple):
+    """Rolling serving statistics of a :class:`MicroBatcher`."""
+
+    latencies: RollingPercentiles
+    batch_sizes: RollingPercentiles
+
+
+class MicroBatcher:
+    """Group concurrent prediction requests into vectorized batches.
+
+    Requests are queued and a background task waits `max_batch_delay`
+    seconds after the first queued request (unless the batch is already
+    full) to gather up to `max_batch_size` requests, which are then
+    predicted in a single call off the event loop.
+
+    Parameters
+    ----------
+    predictor
+        Warm-loaded predictor.
+    max_batch_size
+        Maximum number of lyrics per prediction call.
+    max_batch_delay
+        Maximum time to wait for a batch to fill, in seconds.
+    """
+
+    def __init__(
+        self,
+        predictor: Predictor,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_batch_delay: float = MAX_BATCH_DELAY,
+    ) -> None:
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay = max_batch_delay
+        self.serving_stats = ServingStats(RollingPercentiles(), RollingPercentiles())
+        self.queue: "asyncio.Queue[Tuple[str, asyncio.Future]]" = None
+        self.task: asyncio.Task = None
+        # A single thread serializes access to the predictor and its cache:
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    async def start(self) -> None:
+        """Start the background batching task.
+
+        Returns
+        -------
+        :code:`None`
+        """
+        self.queue = asyncio.Queue()
+        self.task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background batching task.
+
+        Returns
+        -------
+        :code:`None`
+        """
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.executor.shutdown()
+
+    async def predict(self, lyrics: List[str]) -> List[str]:
+        """Predict artists, batched with other concurrent requests.
+
+        Parameters
+        ----------
+        lyrics
+            Lyrics of a single request.
+
+        Returns
+        -------
+        :code:`List[str]`
+            Predicted artists.
+        """
+        start = time.perf_counter()
+        loop = asyncio.get_event_loop()
+
+        futures = []
+        for text in lyrics:
+            future = loop.create_future()
+            self.queue.put_nowait((text, future))
+            futures.append(future)
+        artists = list(await asyncio.gather(*futures))
+
+        self.serving_stats.latencies.record(time.perf_counter() - start)
+        return artists
+
+    async def _run(self) -> None:
+        loop = asyncio.get_event_loop()
+
+        while True:
+            batch = [await self.queue.get()]
+            self._drain(batch)
+            if len(batch) < self.max_batch_size and self.max_batch_delay > 0:
+                await asyncio.sleep(self.max_batch_delay)
+                self._drain(batch)
+
+            self.serving_stats.batch_sizes.record(len(batch))
+            lyrics, futures = zip(*batch)
+            try:
+                artists = await loop.run_in_executor(
+                    self.executor, self.predictor.predict, list(lyrics)
+                )
+                for future, artist in zip(futures, artists):
+                    if not future.done():
+                        future.set_result(artist)
+            except Exception as err:  # pylint: disable=broad-except
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(err)
+
+    def _drain(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        while len(batch) < self.max_batch_size and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+
+    def stats(self) -> dict:
+        """Return serving statistics.
+
+        Returns
+        -------
+        :code:`dict`
+            Request latency percentiles (over the most recent requests)
+            in milliseconds, batch size percentiles and cache counts.
+        """
+        latencies = self.serving_stats.latencies.percentiles()
+        return {
+            "latency_ms": {
+                percentile: latency * 1000 for percentile, latency in latencies.items()
+            },
+            "batch_size": self.serving_stats.batch_sizes.percentiles(),
+            "cache": {
+                "size": len(self.predictor.cache),
+                "hits": self.predictor.cache_hits,
+                "misses": self.predictor.cache_misses,
+            },
+        }
+
+
+def lyrics_hash(lyrics: str) -> bytes:
+    """Return the cache key of lyrics.
+
+    Parameters
+    ----------
+    lyrics
+        Lyrics.
+
+    Returns
+    -------
+    :code:`bytes`
+        128 bit BLAKE2 digest of the lyrics.
+    """
+    return hashlib.blake2b(lyrics.encode(), digest_size=16).digest()
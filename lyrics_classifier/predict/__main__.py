@@ -0,0 +1,55 @@
+"""
+Predict
+=======
+
+This script classifies lyrics with the trained artist classifier.
+
+- :code:`classify FILE [FILE ...]` predicts the artist of lyrics files
+  (or of the standard input when no file is given).
+- :code:`serve` starts the local prediction server.
+- :code:`load-test` load tests a running prediction server.
+"""
+# Standard Library ---------------------------------------------------------------------
+import argparse
+import sys
+from pathlib import Path
+
+# Project ------------------------------------------------------------------------------
+from lyrics_classifier import predict
+from lyrics_classifier.predict import load_test, server
+
+
+parser = argparse.ArgumentParser(prog="python -m lyrics_classifier.predict")
+subparsers = parser.add_subparsers(dest="command", required=True)
+
+classify_parser = subparsers.add_parser("classify")
+classify_parser.add_argument("files", nargs="*", type=Path)
+
+serve_parser = subparsers.add_parser("serve")
+serve_parser.add_argument("--host", default="127.0.0.1")
+serve_parser.add_argument("--port", type=int, default=8000)
+serve_parser.add_argument("--max-batch-size", type=int, default=predict.MAX_BATCH_SIZE)
+serve_parser.add_argument(
+    "--max-batch-delay", type=float, default=predict.MAX_BATCH_DELAY
+)
+
+load_test_parser = subparsers.add_parser("load-test")
+load_test_parser.add_argument("--host", default="127.0.0.1")
+load_test_parser.add_argument("--port", type=int, default=8000)
+load_test_parser.add_argument("--requests", type=int, default=10000)
+load_test_parser.add_argument("--concurrency", type=int, default=64)
+load_test_parser.add_argument("--lyrics", type=int, default=1000)
+
+args = parser.parse_args()
+
+if args.command == "classify":
+    lyrics = [file.read_text() for file in args.files] or [sys.stdin.read()]
+    names = [str(file) for file in args.files] or ["<stdin>"]
+    for name, artist in zip(names, predict.Predictor().predict(lyrics)):
+        print(f"{name}\t{artist}")
+elif args.command == "serve":
+    server.serve(args.host, args.port, args.max_batch_size, args.max_batch_delay)
+elif args.command == "load-test":
+    load_test.load_test(
+        args.host, args.port, args.requests, args.concurrency, args.lyrics
+    )
@@ -0,0 +1,156 @@
+"""
+Load Test
+=========
+
+Load test for the prediction server (see :mod:`predict.server`).
+
+A number of concurrent keep-alive clients send :code:`POST /predict`
+requests with lyrics sampled from the extracted lyrics, and client-side
+latency percentiles and throughput are reported alongside the server
+statistics.
+"""
+
+# Standard Library ---------------------------------------------------------------------
+import asyncio
+import itertools
+import json
+import random
+import time
+from typing import List
+
+# Project ------------------------------------------------------------------------------
+from lyrics_classifier import paths
+from lyrics_classifier.logger import LogLevel, print_table, print_table_entry
+from lyrics_classifier.predict import RollingPercentiles
+from lyrics_classifier.predict.server import read_headers
+
+
+def load_test(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    n_requests: int = 10000,
+    concurrency: int = 64,
+    n_lyrics: int = 1000,
+) -> None:
+    """Run the load test against a running prediction server.
+
+    Parameters
+    ----------
+    host
+        Server host.
+    port
+        Server port.
+    n_requests
+        Total number of requests.
+    concurrency
+        Number of concurrent clients.
+    n_lyrics
+        Number of distinct lyrics sampled; requests cycle through them,
+        so a value below `n_requests` also exercises the cache.
+
+    Returns
+    -------
+    :code:`None`
+    """
+    asyncio.run(_load_test(host, port, n_requests, concurrency, n_lyrics))
+
+
+async def _load_test(
+    host: str, port: int, n_requests: int, concurrency: int, n_lyrics: int
+) -> None:
+    print_table("LOAD TEST")
+
+    lyrics = sample_lyrics(n_lyrics)
+    bodies = itertools.cycle([json.dumps({"lyrics": text}).encode() for text in lyrics])
+    remaining = iter(range(n_requests))
+    latencies = RollingPercentiles(window=n_requests)
+
+    async def client() -> None:
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for _ in remaining:
+                start = time.perf_counter()
+                await _request(reader, writer, "POST", "/predict", next(bodies))
+                latencies.record(time.perf_counter() - start)
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    print_table_entry(
+        "Throughput", f"{n_requests / elapsed:,.0f} requests/s", LogLevel.INFO
+    )
+    for percentile, latency in latencies.percentiles().items():
+        print_table_entry(
+            f"Client latency {percentile}", f"{latency * 1000:.2f} ms", LogLevel.INFO
+        )
+
+    reader, writer = await asyncio.open_connection(host, port)
+    stats = json.loads(await _request(reader, writer, "GET", "/stats"))
+    writer.close()
+
+    for percentile, latency in stats["latency_ms"].items():
+        print_table_entry(
+            f"Server latency {percentile}", f"{latency:.2f} ms", LogLevel.INFO
+        )
+    for percentile, batch_size in stats["batch_size"].items():
+        print_table_entry(
+            f"Batch size {percentile}", f"{batch_size:.0f}", LogLevel.INFO
+        )
+    print_table_entry(
+        "Cache",
+        f"{stats['cache']['hits']:,} hits | {stats['cache']['misses']:,} misses",
+        LogLevel.INFO,
+    )
+
+
+def sample_lyrics(n_lyrics: int) -> List[str]:
+    """Sample lyrics from the extracted lyrics text files.
+
+    Parameters
+    ----------
+    n_lyrics
+        Maximum number of lyrics.
+
+    Returns
+    -------
+    :code:`List[str]`
+        Lyrics.
+    """
+    lyrics_text_file_paths = list(paths.lyrics_dir_path().glob("*/*.txt"))
+    return [
+        lyrics_text_file_path.read_text()
+        for lyrics_text_file_path in random.sample(
+            lyrics_text_file_paths, min(n_lyrics, len(lyrics_text_file_paths))
+        )
+    ]
+
+
+async def _request(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    method: str,
+    target: str,
+    body: bytes = b"",
+) -> bytes:
+    writer.write(
+        (
+            f"{method} {target} HTTP/1.1\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "\r\n"
+        ).encode("latin-1")
+        + body
+    )
+    await writer.drain()
+
+    status_line = await reader.readline()
+    headers = await read_headers(reader)
+
+    response_body = await reader.readexactly(int(headers.get("content-length", 0)))
+    if b" 200 " not in status_line:
+        raise RuntimeError(f"{status_line.decode().strip()}: {response_body.decode()}")
+
+    return response_body
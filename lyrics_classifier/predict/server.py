@@ -0,0 +1,226 @@
+"""
+Server
+======
+
+Minimal local HTTP/1.1 prediction endpoint built on :mod:`asyncio`.
+
+Endpoints:
+
+- :code:`POST /predict` with a JSON body :code:`{"lyrics": "..."}` or
+  :code:`{"lyrics": ["...", "..."]}` returns :code:`{"artists": [...]}`.
+- :code:`GET /stats` returns latency percentiles and cache statistics.
+
+Connections are kept alive, so clients can pipeline requests.
+"""
+
+# Standard Library ---------------------------------------------------------------------
+import asyncio
+import json
+from typing import Dict, Tuple
+
+# Project ------------------------------------------------------------------------------
+from lyrics_classifier.logger import LogLevel, print_table, print_table_entry
+from lyrics_classifier.predict import (
+    MAX_BATCH_DELAY,
+    MAX_BATCH_SIZE,
+    MicroBatcher,
+    Predictor,
+)
+
+
+MAX_BODY_SIZE = 2 ** 24
+
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    """Raised on requests that cannot be served.
+
+    Parameters
+    ----------
+    message
+        Error message, returned to the client.
+    status_code
+        HTTP status code.
+    """
+
+    def __init__(self, message: str, status_code: int = 400) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    max_batch_size: int = MAX_BATCH_SIZE,
+    max_batch_delay: float = MAX_BATCH_DELAY,
+) -> None:
+    """Warm-load the model and serve predictions until interrupted.
+
+    Parameters
+    ----------
+    host
+        Host to bind.
+    port
+        Port to bind.
+    max_batch_size
+        Maximum number of lyrics per prediction call.
+    max_batch_delay
+        Maximum time to wait for a batch to fill, in seconds.
+
+    Returns
+    -------
+    :code:`None`
+    """
+    try:
+        asyncio.run(_serve(host, port, max_batch_size, max_batch_delay))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _serve(
+    host: str, port: int, max_batch_size: int, max_batch_delay: float
+) -> None:
+    print_table("PREDICTION SERVER")
+
+    batcher = MicroBatcher(Predictor(), max_batch_size, max_batch_delay)
+    await batcher.start()
+    print_table_entry("Model", "Loaded.", LogLevel.INFO)
+
+    server = await asyncio.start_server(
+        lambda reader, writer: _handle_connection(batcher, reader, writer), host, port
+    )
+    print_table_entry("Address", f"http://{host}:{port}", LogLevel.INFO)
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await batcher.stop()
+
+
+async def _handle_connection(
+    batcher: MicroBatcher, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> None:
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            except HTTPError as err:
+                _write_response(writer, err.status_code, {"error": str(err)}, False)
+                await writer.drain()
+                break
+            if request is None:
+                break
+            method, target, body, keep_alive = request
+
+            try:
+                status_code, payload = 200, await _route(batcher, method, target, body)
+            except HTTPError as err:
+                status_code, payload = err.status_code, {"error": str(err)}
+            except Exception as err:  # pylint: disable=broad-except
+                status_code, payload = 500, {"error": str(err)}
+
+            _write_response(writer, status_code, payload, keep_alive)
+            await writer.drain()
+
+            if not keep_alive:
+                break
+    finally:
+        writer.close()
+
+
+async def read_headers(reader: asyncio.StreamReader) -> Dict[str, str]:
+    """Read HTTP headers, up to the empty line ending them.
+
+    Parameters
+    ----------
+    reader
+        Stream reader of the connection.
+
+    Returns
+    -------
+    :code:`Dict[str, str]`
+        Header values keyed by lower case header name.
+    """
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return headers
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, bytes, bool]:
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError("Malformed request line.") from None
+
+    headers = await read_headers(reader)
+
+    try:
+        content_length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HTTPError("Malformed Content-Length header.") from None
+    if content_length > MAX_BODY_SIZE:
+        raise HTTPError("Request body too large.", 413)
+    body = await reader.readexactly(content_length) if content_length else b""
+
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" and (
+        version == "HTTP/1.1" or connection == "keep-alive"
+    )
+
+    return method, target, body, keep_alive
+
+
+async def _route(batcher: MicroBatcher, method: str, target: str, body: bytes) -> dict:
+    if method == "POST" and target == "/predict":
+        try:
+            lyrics = json.loads(body)["lyrics"]
+        except (ValueError, KeyError, TypeError):
+            raise HTTPError('Expected a JSON body with a "lyrics" field.') from None
+        if isinstance(lyrics, str):
+            lyrics = [lyrics]
+        if not isinstance(lyrics, list) or not all(map(_is_str, lyrics)):
+            raise HTTPError('"lyrics" must be a string or a list of strings.')
+        return {"artists": await batcher.predict(lyrics)}
+
+    if method == "GET" and target == "/stats":
+        return batcher.stats()
+
+    raise HTTPError(f"No route for {method} {target}.", 404)
+
+
+def _is_str(value) -> bool:
+    return isinstance(value, str)
+
+
+def _write_response(
+    writer: asyncio.StreamWriter, status_code: int, payload: dict, keep_alive: bool
+) -> None:
+    body = json.dumps(payload).encode()
+    writer.write(
+        (
+            f"HTTP/1.1 {status_code} {HTTP_REASONS[status_code]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        ).encode("latin-1")
+        + body
+    )
@@ -0,0 +1,153 @@
+"""
+Roster
+======
+
+This module provides methods for loading the artist roster and splitting
+it into shards.
+
+Large rosters are read from an artist list file, with one artist per
+line and optional tab separated :code:`key=value` metadata:
+
+.. code-block:: text
+
+    # Comments and blank lines are ignored.
+    Dire Straits
+    The Animals	genre=rock	country=UK
+
+Rosters are loaded once per file and cached. Shards are assigned by
+hashing artist names, so that several nodes can split the same roster
+deterministically, without any coordination.
+"""
+
+# Standard Library ---------------------------------------------------------------------
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, NamedTuple, Tuple
+
+
+class Artist(NamedTuple):
+    """Roster artist, with its (optional) metadata."""
+
+    name: str
+    metadata: Dict[str, str]
+
+
+class Shard(NamedTuple):
+    """Roster shard, with a zero-based index out of a count of shards."""
+
+    index: int
+    count: int
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    def contains(self, artist: str) -> bool:
+        """Return whether an artist belongs to the shard.
+
+        Parameters
+        ----------
+        artist
+            Artist name.
+
+        Returns
+        -------
+        :code:`bool`
+            Whether the artist belongs to the shard.
+        """
+        return shard_index(artist, self.count) == self.index
+
+
+def parse_shard(shard: str) -> Shard:
+    """Parse a shard from its "i/N" notation, e.g. "0/4" to "3/4".
+
+    Parameters
+    ----------
+    shard
+        Shard notation.
+
+    Raises
+    ------
+    :code:`ValueError`
+        If the notation is invalid.
+
+    Returns
+    -------
+    :code:`Shard`
+        Shard.
+    """
+    index, _, count = shard.partition("/")
+    index, count = int(index), int(count)
+
+    if not 0 <= index < count:
+        raise ValueError(f"Invalid shard: {shard}")
+
+    return Shard(index, count)
+
+
+def shard_index(artist: str, count: int) -> int:
+    """Return the shard index of an artist.
+
+    Artist names are hashed with MD5 rather than :code:`hash`, which is
+    salted per process.
+
+    Parameters
+    ----------
+    artist
+        Artist name.
+    count
+        Number of shards.
+
+    Returns
+    -------
+    :code:`int`
+        Zero-based shard index.
+    """
+    digest = hashlib.md5(artist.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+@lru_cache(maxsize=None)
+def load_roster(roster_file_path: Path) -> Tuple[Artist, ...]:
+    """Load an artist list file.
+
+    Parameters
+    ----------
+    roster_file_path
+        Artist list file path.
+
+    Raises
+    ------
+    :code:`ValueError`
+        If a line has no artist name or a metadata field is not of the
+        :code:`key=value` form, naming the file and line number.
+
+    Returns
+    -------
+    :code:`Tuple[Artist, ...]`
+        Artists, in file order and without duplicates.
+    """
+    artists = {}
+
+    with roster_file_path.open("r", encoding="utf-8") as roster_file:
+        for line_number, line in enumerate(roster_file, start=1):
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+
+            name, *fields = (field.strip() for field in line.split("\t"))
+            if not name:
+                raise ValueError(f"{roster_file_path}:{line_number}: No artist name.")
+
+            metadata = {}
+            for field in filter(None, fields):
+                key, separator, value = field.partition("=")
+                if not separator or not key:
+                    raise ValueError(
+                        f"{roster_file_path}:{line_number}: Invalid metadata field "
+                        f"'{field}', expected 'key=value'."
+                    )
+                metadata[key] = value
+
+            artists.setdefault(name, Artist(name, metadata))
+
+    return tuple(artists.values())
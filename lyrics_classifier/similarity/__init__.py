@@ -0,0 +1,333 @@
+"""
+Similarity
+==========
+
+This module provides top-k cosine similarity searches over songs and
+artists.
+
+Song vectors are the TF-IDF weighted, L2 normalized hashed features of
+the feature store (see :mod:`featurize`); they are computed on the fly
+from the memory-mapped batches, so a query only holds one batch of
+scores at a time and keeps the best candidates with partial sorts.
+Artist vectors are the normalized sums of their song vectors. The full
+artist similarity matrix is computed in row tiles across worker
+processes and written to a memory-mapped `.npy` file.
+"""
+
+# Standard Library ---------------------------------------------------------------------
+from multiprocessing import Pool
+from typing import List, Tuple
+
+# Data Science
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+# Project ------------------------------------------------------------------------------
+from lyrics_classifier import featurize, paths
+from lyrics_classifier.logger import LogLevel, print_table, print_table_entry
+
+
+TILE_SIZE = 1024
+
+
+def build_similarity() -> None:
+    """Compute and save the IDF weights and the artist vectors.
+
+    The feature store is streamed twice: once for the document
+    frequencies and once for the artist vectors.
+
+    .. warning::
+        This function will overwrite existing data.
+
+    Returns
+    -------
+    :code:`None`
+    """
+    print_table("SIMILARITY")
+
+    manifest = featurize.load_manifest()
+    n_features = manifest["n_features"]
+
+    document_frequency = np.zeros(n_features, dtype=np.int64)
+    n_docs = 0
+    for features, _ in featurize.iter_batches():
+        document_frequency += np.bincount(features.indices, minlength=n_features)
+        n_docs += int(np.sum(np.diff(features.indptr) > 0))
+
+    # Smooth IDF, as in scikit-learn's TfidfTransformer:
+    idf = np.log((1 + n_docs) / (1 + document_frequency)).astype(np.float32) + 1
+    np.save(paths.similarity_dir_path().joinpath("idf.npy"), idf)
+    print_table_entry("IDF", f"Computed over {n_docs:,} songs.", LogLevel.INFO)
+
+    n_artists = len(manifest["classes"])
+    artists = sparse.csr_matrix((n_artists, n_features), dtype=np.float32)
+    for features, labels in featurize.iter_batches():
+        membership = sparse.csr_matrix(
+            (np.ones(len(labels), dtype=np.float32), (labels, np.arange(len(labels)))),
+            shape=(n_artists, len(labels)),
+        )
+        artists = artists + membership @ tfidf(features, idf)
+    artists = normalize(artists).astype(np.float32)
+
+    featurize.save_batch(
+        paths.similarity_dir_path().joinpath("artists"),
+        artists,
+        np.arange(n_artists, dtype=np.int32),
+    )
+    print_table_entry("Artists", f"{n_artists:,} artist vectors.", LogLevel.INFO)
+
+
+def load_idf() -> np.ndarray:
+    """Load the IDF weights.
+
+    Returns
+    -------
+    :code:`np.ndarray`
+        IDF weight of each hashed feature.
+    """
+    return np.load(paths.similarity_dir_path().joinpath("idf.npy"), mmap_mode="r")
+
+
+def load_artists() -> sparse.csr_matrix:
+    """Load the artist vectors.
+
+    Returns
+    -------
+    :code:`sparse.csr_matrix`
+        Artist vectors, one row per artist (in features manifest order).
+    """
+    n_features = featurize.load_manifest()["n_features"]
+    artists_dir_path = paths.similarity_dir_path().joinpath("artists")
+    data, indices, indptr = (
+        np.load(artists_dir_path.joinpath(f"{name}.npy"), mmap_mode="r")
+        for name in ("data", "indices", "indptr")
+    )
+    return sparse.csr_matrix(
+        (data, indices, indptr), shape=(len(indptr) - 1, n_features), copy=False
+    )
+
+
+def tfidf(features: sparse.csr_matrix, idf: np.ndarray) -> sparse.csr_matrix:
+    """Weight hashed features by IDF and normalize them.
+
+    Parameters
+    ----------
+    features
+        CSR feature matrix.
+    idf
+        IDF weights.
+
+    Returns
+    -------
+    :code:`sparse.csr_matrix`
+        L2 normalized TF-IDF matrix.
+    """
+    weighted = sparse.csr_matrix(
+        (features.data * idf[features.indices], features.indices, features.indptr),
+        shape=features.shape,
+    )
+    return normalize(weighted)
+
+
+def vectorize_lyrics(lyrics: List[str]) -> sparse.csr_matrix:
+    """Return the TF-IDF vectors of lyrics.
+
+    Parameters
+    ----------
+    lyrics
+        Lyrics.
+
+    Returns
+    -------
+    :code:`sparse.csr_matrix`
+        L2 normalized TF-IDF matrix.
+    """
+    n_features = featurize.load_manifest()["n_features"]
+    return tfidf(featurize.vectorizer(n_features).transform(lyrics), load_idf())
+
+
+def song_vector(row: int) -> sparse.csr_matrix:
+    """Return the TF-IDF vector of a song of the feature store.
+
+    Parameters
+    ----------
+    row
+        Song row in the feature store (see :meth:`featurize.load_song_paths`).
+
+    Raises
+    ------
+    :code:`IndexError`
+        If the row is out of range.
+    :code:`ValueError`
+        If the song has no lyrics, and thus no vector to compare.
+
+    Returns
+    -------
+    :code:`sparse.csr_matrix`
+        L2 normalized TF-IDF vector (as a single row matrix).
+    """
+    manifest = featurize.load_manifest()
+    for batch in manifest["batches"]:
+        if row < batch["n_samples"]:
+            features, _ = featurize.load_batch(batch["name"], manifest["n_features"])
+            if not features[row].nnz:
+                raise ValueError("Song without lyrics.")
+            return tfidf(features[row], load_idf())
+        row -= batch["n_samples"]
+    raise IndexError("Song row out of range.")
+
+
+def similar_songs(
+    query: sparse.csr_matrix, k: int = 10, exclude: int = None
+) -> List[Tuple[int, float]]:
+    """Find the songs most similar to a query vector.
+
+    Parameters
+    ----------
+    query
+        L2 normalized TF-IDF query vector (as a single row matrix).
+    k
+        Number of songs.
+    exclude
+        Song row to leave out of the results (e.g. the query song).
+
+    Returns
+    -------
+    :code:`List[Tuple[int, float]]`
+        Song rows in the feature store and cosine similarities, most
+        similar first. Songs sharing no term with the query (e.g. songs
+        without lyrics) are left out.
+    """
+    idf = load_idf()
+    query_t = query.T.tocsc()
+
+    best_rows = np.empty(0, dtype=np.int64)
+    best_scores = np.empty(0, dtype=np.float32)
+    offset = 0
+
+    for features, _ in featurize.iter_batches():
+        scores = (tfidf(features, idf) @ query_t).toarray().ravel()
+        rows = np.arange(offset, offset + len(scores))
+        offset += len(scores)
+
+        if exclude is not None:
+            scores[rows == exclude] = -np.inf
+
+        best_rows, best_scores = _top_k(
+            np.concatenate([best_rows, rows]), np.concatenate([best_scores, scores]), k,
+        )
+
+    return [(int(row), float(score)) for row, score in zip(best_rows, best_scores)]
+
+
+def similar_artists(
+    query: sparse.csr_matrix, k: int = 10, exclude: int = None
+) -> List[Tuple[str, float]]:
+    """Find the artists most similar to a query vector.
+
+    Parameters
+    ----------
+    query
+        L2 normalized TF-IDF query vector (as a single row matrix).
+    k
+        Number of artists.
+    exclude
+        Artist label to leave out of the results (e.g. the query artist).
+
+    Returns
+    -------
+    :code:`List[Tuple[str, float]]`
+        Artist names and cosine similarities, most similar first. Artists
+        sharing no term with the query are left out.
+    """
+    classes = featurize.load_manifest()["classes"]
+    artists = load_artists()
+    query_t = query.T.tocsc()
+
+    best_labels = np.empty(0, dtype=np.int64)
+    best_scores = np.empty(0, dtype=np.float32)
+
+    for start in range(0, artists.shape[0], TILE_SIZE):
+        scores = (artists[start : start + TILE_SIZE] @ query_t).toarray().ravel()
+        labels = np.arange(start, start + len(scores))
+        if exclude is not None:
+            scores[labels == exclude] = -np.inf
+        best_labels, best_scores = _top_k(
+            np.concatenate([best_labels, labels]),
+            np.concatenate([best_scores, scores]),
+            k,
+        )
+
+    return [
+        (classes[label], float(score)) for label, score in zip(best_labels, best_scores)
+    ]
+
+
+def artist_similarity_matrix(processes: int = None, tile_size: int = TILE_SIZE) -> None:
+    """Compute the all-pairs artist cosine similarity matrix.
+
+    Row tiles are computed in parallel worker processes, which read the
+    artist vectors and write their tile straight into the memory-mapped
+    `artist_similarity.npy` file of the similarity directory.
+
+    .. warning::
+        This function will overwrite existing data.
+
+    Parameters
+    ----------
+    processes
+        Number of worker processes, :code:`None` uses all the CPUs.
+    tile_size
+        Number of artists per row tile.
+
+    Returns
+    -------
+    :code:`None`
+    """
+    print_table("ARTIST SIMILARITY MATRIX")
+
+    n_artists = load_artists().shape[0]
+    matrix_file_path = paths.similarity_dir_path().joinpath("artist_similarity.npy")
+    # Allocate the file upfront; workers open it in read/write mode:
+    matrix = np.lib.format.open_memmap(
+        matrix_file_path, mode="w+", dtype=np.float32, shape=(n_artists, n_artists)
+    )
+    del matrix
+
+    tiles = [(start, tile_size) for start in range(0, n_artists, tile_size)]
+    with Pool(processes) as pool:
+        for start in pool.imap_unordered(_compute_similarity_tile, tiles):
+            print_table_entry(
+                f"Artists {start:,}+",
+                f"{min(tile_size, n_artists - start):,} rows computed.",
+                LogLevel.INFO,
+            )
+
+
+def _compute_similarity_tile(tile: Tuple[int, int]) -> int:
+    start, tile_size = tile
+
+    artists = load_artists()
+    matrix = np.load(
+        paths.similarity_dir_path().joinpath("artist_similarity.npy"), mmap_mode="r+"
+    )
+    matrix[start : start + tile_size] = (
+        (artists[start : start + tile_size] @ artists.T).toarray().astype(np.float32)
+    )
+    matrix.flush()
+
+    return start
+
+
+def _top_k(
+    ids: np.ndarray, scores: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    # Zero scores share no term with the query, excluded ones are -inf:
+    positive = scores > 0
+    ids, scores = ids[positive], scores[positive]
+    if len(scores) > k:
+        best = np.argpartition(-scores, k)[:k]
+        ids, scores = ids[best], scores[best]
+    order = np.argsort(-scores, kind="stable")
+    return ids[order], scores[order]
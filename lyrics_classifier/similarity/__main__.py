@@ -0,0 +1,108 @@
+"""
+Similarity
+==========
+
+This script builds and queries the song and artist similarity data.
+
+- :code:`build` computes the IDF weights and the artist vectors from the
+  feature store.
+- :code:`songs ARTIST TITLE` lists the songs most similar to a song.
+- :code:`artists ARTIST` lists the artists most similar to an artist.
+- :code:`matrix` computes the all-pairs artist similarity matrix.
+"""
+# Standard Library ---------------------------------------------------------------------
+import argparse
+import sys
+import time
+
+# Data Science
+import numpy as np
+
+# Project ------------------------------------------------------------------------------
+from lyrics_classifier import featurize, similarity
+from lyrics_classifier.logger import LogLevel, print_table, print_table_entry
+
+
+parser = argparse.ArgumentParser(prog="python -m lyrics_classifier.similarity")
+subparsers = parser.add_subparsers(dest="command", required=True)
+
+subparsers.add_parser("build")
+
+songs_parser = subparsers.add_parser("songs")
+songs_parser.add_argument("artist")
+songs_parser.add_argument("title")
+songs_parser.add_argument("-k", type=int, default=10)
+
+artists_parser = subparsers.add_parser("artists")
+artists_parser.add_argument("artist")
+artists_parser.add_argument("-k", type=int, default=10)
+
+matrix_parser = subparsers.add_parser("matrix")
+matrix_parser.add_argument("--processes", type=int, default=None)
+matrix_parser.add_argument("--tile-size", type=int, default=similarity.TILE_SIZE)
+
+args = parser.parse_args()
+
+if args.command == "build":
+    similarity.build_similarity()
+elif args.command == "songs":
+    # Feature rows are mapped to songs by song path, as the songs CSV file
+    # may have changed (e.g. after a delta merge) since featurizing:
+    songs = {song.song_path: song for song in featurize.read_songs()}
+    song_path = next(
+        (
+            song.song_path
+            for song in songs.values()
+            if song.artist == args.artist and song.song_title == args.title
+        ),
+        None,
+    )
+    if song_path is None:
+        print_table_entry(args.artist, f"No song '{args.title}'.", LogLevel.ERROR)
+        sys.exit(1)
+
+    song_paths = featurize.load_song_paths()
+    rows = np.flatnonzero(song_paths == song_path)
+    if rows.size == 0:
+        print_table_entry(
+            args.artist, f"Song '{args.title}' not featurized.", LogLevel.ERROR
+        )
+        sys.exit(1)
+    row = int(rows[0])
+
+    start = time.perf_counter()
+    try:
+        query = similarity.song_vector(row)
+    except ValueError as err:
+        print_table_entry(args.artist, f"'{args.title}': {err}", LogLevel.ERROR)
+        sys.exit(1)
+    results = similarity.similar_songs(query, k=args.k, exclude=row)
+    elapsed = time.perf_counter() - start
+
+    print_table(f"SIMILAR SONGS: {args.artist} - {args.title}")
+    for result_row, score in results:
+        song = songs.get(song_paths[result_row])
+        print_table_entry(
+            f"{score:.3f}",
+            f"{song.artist} - {song.song_title}" if song else song_paths[result_row],
+            LogLevel.INFO if song else LogLevel.WARNING,
+        )
+    print_table_entry("Search", f"{elapsed * 1000:.1f} ms.", LogLevel.INFO)
+elif args.command == "artists":
+    classes = featurize.load_manifest()["classes"]
+    if args.artist not in classes:
+        print_table_entry(args.artist, "Unknown artist.", LogLevel.ERROR)
+        sys.exit(1)
+    label = classes.index(args.artist)
+
+    results = similarity.similar_artists(
+        similarity.load_artists()[label], k=args.k, exclude=label
+    )
+
+    print_table(f"SIMILAR ARTISTS: {args.artist}")
+    for artist, score in results:
+        print_table_entry(f"{score:.3f}", artist, LogLevel.INFO)
+elif args.command == "matrix":
+    similarity.artist_similarity_matrix(
+        processes=args.processes, tile_size=args.tile_size
+    )
@@ -0,0 +1,305 @@
+"""
+Train
+=====
+
+This module provides methods for training the artist classifier out of
+core.
+
+Mini-batches are streamed from the memory-mapped feature store (see
+:mod:`featurize`) and fed to an incremental linear model with
+:code:`partial_fit`, so the corpus never needs to fit in memory. A
+held-out split is drawn deterministically per batch and evaluated the
+same streaming way.
+
+The trained model is saved as a memory-mapped artifact (see
+:mod:`artifacts`), along with the vectorizer configuration it was
+trained with, and loaded back as a :class:`LinearModel`.
+"""
+
+# Standard Library ---------------------------------------------------------------------
+import resource
+import sys
+import time
+from typing import List, Tuple
+
+# Data Science
+import numpy as np
+from scipy import sparse
+from sklearn.linear_model import SGDClassifier
+
+# Project ------------------------------------------------------------------------------
+from lyrics_classifier import artifacts, featurize, paths
+from lyrics_classifier.logger import LogLevel, print_table, print_table_entry
+
+
+Batch = Tuple[sparse.csr_matrix, np.ndarray]
+
+
+def train_artist_classifier(
+    epochs: int = 5, test_size: float = 0.2, alpha: float = 1e-5, seed: int = 0
+) -> SGDClassifier:
+    """Train the artist classifier on the feature store and save it.
+
+    Parameters
+    ----------
+    epochs
+        Number of passes over the training batches.
+    test_size
+        Fraction of the songs held out for evaluation.
+    alpha
+        Regularization strength of the linear model.
+    seed
+        Seed for the held-out split and the batch order.
+
+    Returns
+    -------
+    :code:`SGDClassifier`
+        Trained artist classifier.
+    """
+    manifest = featurize.load_manifest()
+    classes = np.arange(len(manifest["classes"]))
+    batch_names = [batch["name"] for batch in manifest["batches"]]
+
+    classifier = SGDClassifier(alpha=alpha, random_state=seed)
+
+    print_table("TRAINING")
+
+    for epoch in range(epochs):
+        start = time.perf_counter()
+        n_docs = 0
+
+        for batch_index in np.random.RandomState(seed + epoch).permutation(
+            len(batch_names)
+        ):
+            (features, labels), _ = _split_batch(
+                manifest, batch_names[batch_index], batch_index, test_size, seed
+            )
+            if features.shape[0]:
+                classifier.partial_fit(features, labels, classes=classes)
+                n_docs += features.shape[0]
+
+        elapsed = time.perf_counter() - start
+        print_table_entry(
+            f"Epoch {epoch + 1}/{epochs}",
+            f"{n_docs / elapsed:,.0f} docs/s | peak RSS {peak_rss_mb():,.0f} MB",
+            LogLevel.INFO,
+        )
+
+    evaluate_artist_classifier(classifier, test_size, seed)
+    save_model(classifier, manifest["classes"], manifest["n_features"])
+
+    return classifier
+
+
+def evaluate_artist_classifier(
+    classifier: SGDClassifier, test_size: float = 0.2, seed: int = 0
+) -> float:
+    """Evaluate the artist classifier on the held-out split.
+
+    Parameters
+    ----------
+    classifier
+        Trained artist classifier.
+    test_size
+        Fraction of the songs held out for evaluation, as used for
+        training.
+    seed
+        Seed of the held-out split, as used for training.
+
+    Returns
+    -------
+    :code:`float`
+        Held-out accuracy.
+    """
+    manifest = featurize.load_manifest()
+
+    print_table("EVALUATION")
+
+    start = time.perf_counter()
+    n_docs = 0
+    n_correct = 0
+
+    for batch_index, batch in enumerate(manifest["batches"]):
+        _, (features, labels) = _split_batch(
+            manifest, batch["name"], batch_index, test_size, seed
+        )
+        if features.shape[0]:
+            n_correct += int(np.sum(classifier.predict(features) == labels))
+            n_docs += features.shape[0]
+
+    elapsed = time.perf_counter() - start
+    accuracy = n_correct / n_docs if n_docs else float("nan")
+
+    print_table_entry("Accuracy", f"{accuracy:.3f} on {n_docs:,} songs", LogLevel.INFO)
+    print_table_entry(
+        "Throughput",
+        f"{n_docs / elapsed:,.0f} docs/s | peak RSS {peak_rss_mb():,.0f} MB",
+        LogLevel.INFO,
+    )
+
+    return accuracy
+
+
+def _split_batch(
+    manifest: dict, batch_name: str, batch_index: int, test_size: float, seed: int
+) -> Tuple[Batch, Batch]:
+    features, labels = featurize.load_batch(batch_name, manifest["n_features"])
+
+    # Songs without lyrics are empty rows and carry no signal:
+    has_lyrics = np.diff(features.indptr) > 0
+    # Seeding per batch keeps the split identical across epochs:
+    is_test = np.random.RandomState(seed + batch_index).rand(len(labels)) < test_size
+
+    return (
+        (features[has_lyrics & ~is_test], labels[has_lyrics & ~is_test]),
+        (features[has_lyrics & is_test], labels[has_lyrics & is_test]),
+    )
+
+
+def peak_rss_mb() -> float:
+    """Return the peak resident set size of the current process.
+
+    Returns
+    -------
+    :code:`float`
+        Peak resident set size in megabytes.
+    """
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes on Linux:
+    return max_rss / 2 ** 20 if sys.platform == "darwin" else max_rss / 2 ** 10
+
+
+class LinearModel:
+    """Linear artist classifier loaded from a model artifact.
+
+    Weights are stored feature-major, so that classifying sparse features
+    only touches the pages of the features that occur in them.
+
+    Parameters
+    ----------
+    weights
+        Weights, of shape :code:`(n_features, n_classes)`.
+    bias
+        Bias, of shape :code:`(n_classes,)`.
+    """
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray) -> None:
+        self.weights = weights
+        self.bias = bias
+
+    def decision_function(self, features: sparse.csr_matrix) -> np.ndarray:
+        """Return the class scores.
+
+        Parameters
+        ----------
+        features
+            CSR feature matrix.
+
+        Returns
+        -------
+        :code:`np.ndarray`
+            Class scores, of shape :code:`(n_samples, n_classes)`.
+        """
+        return np.asarray(features @ self.weights) + self.bias
+
+    def predict(self, features: sparse.csr_matrix) -> np.ndarray:
+        """Predict class labels.
+
+        Parameters
+        ----------
+        features
+            CSR feature matrix.
+
+        Returns
+        -------
+        :code:`np.ndarray`
+            Class labels.
+        """
+        return np.argmax(self.decision_function(features), axis=1)
+
+
+def save_model(classifier: SGDClassifier, classes: List[str], n_features: int) -> None:
+    """Save the artist classifier as a model artifact.
+
+    .. warning::
+        This function will overwrite existing data.
+
+    Parameters
+    ----------
+    classifier
+        Trained artist classifier.
+    classes
+        Artist names, indexed by label.
+    n_features
+        Number of hashed features the classifier was trained on.
+
+    Returns
+    -------
+    :code:`None`
+    """
+    weights, bias = classifier.coef_.T, classifier.intercept_
+    if len(classes) == 2:
+        # Binary classifiers have a single decision function, positive for
+        # the second class:
+        weights, bias = np.hstack([-weights, weights]), np.hstack([-bias, bias])
+
+    artifacts.save_artifact(
+        paths.model_dir_path(),
+        arrays={
+            "weights": weights.astype(np.float32),
+            "bias": bias.astype(np.float32),
+        },
+        vocabularies={"classes": classes},
+        metadata={
+            "model": "linear",
+            "n_features": n_features,
+            "vectorizer": featurize.vectorizer_config(n_features),
+        },
+    )
+
+
+def load_model(verify: bool = False) -> Tuple[LinearModel, List[str], int]:
+    """Load the artist classifier from its model artifact.
+
+    The weights are memory-mapped, so loading takes constant time and
+    worker processes share their pages.
+
+    Parameters
+    ----------
+    verify
+        Verify the checksums of the model artifact files.
+
+    Raises
+    ------
+    :code:`ArtifactError`
+        If the model artifact is missing, corrupt or of another format
+        version, or if it was trained with another vectorizer
+        configuration than :meth:`featurize.vectorizer`'s.
+
+    Returns
+    -------
+    :code:`Tuple[LinearModel, List[str], int]`
+        Artist classifier, artist names indexed by label and number of
+        hashed features.
+    """
+    artifact = artifacts.load_artifact(paths.model_dir_path(), verify=verify)
+
+    n_features = artifact.metadata["n_features"]
+    trained_config = artifact.metadata.get("vectorizer", {})
+    config = featurize.vectorizer_config(n_features)
+    mismatches = sorted(
+        name
+        for name in config.keys() | trained_config.keys()
+        if config.get(name) != trained_config.get(name)
+    )
+    if mismatches:
+        raise artifacts.ArtifactError(
+            f"Model trained with another vectorizer configuration "
+            f"({', '.join(mismatches)}), retrain it."
+        )
+
+    return (
+        LinearModel(artifact.arrays["weights"], artifact.arrays["bias"]),
+        list(artifact.vocabularies["classes"]),
+        n_features,
+    )
@@ -0,0 +1,34 @@
+"""
+Train
+=====
+
+This script trains the artist classifier out of core, featurizing the
+extracted lyrics first if the feature store is missing.
+"""
+# Standard Library ---------------------------------------------------------------------
+import argparse
+
+# Project ------------------------------------------------------------------------------
+from lyrics_classifier import featurize, paths, train
+
+
+parser = argparse.ArgumentParser(prog="python -m lyrics_classifier.train")
+parser.add_argument("--epochs", type=int, default=5)
+parser.add_argument("--test-size", type=float, default=0.2)
+parser.add_argument("--alpha", type=float, default=1e-5)
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument(
+    "--featurize", action="store_true", help="Rebuild the feature store first."
+)
+parser.add_argument("--batch-size", type=int, default=featurize.BATCH_SIZE)
+parser.add_argument(
+    "--processes", type=int, default=1, help="Number of featurizing processes."
+)
+args = parser.parse_args()
+
+if args.featurize or not paths.features_manifest_file_path().exists():
+    featurize.featurize_lyrics(batch_size=args.batch_size, processes=args.processes)
+
+train.train_artist_classifier(
+    epochs=args.epochs, test_size=args.test_size, alpha=args.alpha, seed=args.seed
+)
@@ -0,0 +1,249 @@
+"""
+Writer
+======
+
+This module provides a write-behind file writer, so that the network and
+CPU bound stages do not stall on disk latency.
+
+Writes are queued in a bounded queue (blocking the producer when it is
+full) and carried out by a pool of background threads. Every file is
+written to a temporary file in the target directory and renamed over the
+target, so readers never see partially written files.
+"""
+
+# Standard Library ---------------------------------------------------------------------
+import os
+import queue
+import threading
+import uuid
+from enum import Enum
+from pathlib import Path
+from typing import List, Tuple
+
+
+class FsyncPolicy(Enum):
+    """Fsync policy enum.
+
+    - :code:`NEVER` leaves durability to the operating system.
+    - :code:`ALWAYS` syncs every file before renaming it.
+    - :code:`BATCH` syncs renamed files in batches and at every flush
+      barrier: files are visible before they are durable, but the sync
+      cost is amortized.
+    """
+
+    NEVER = 0
+    ALWAYS = 1
+    BATCH = 2
+
+
+class WriteError(Exception):
+    """Raised on flush when queued writes have failed.
+
+    Parameters
+    ----------
+    errors
+        Failed file paths and their errors.
+    """
+
+    def __init__(self, errors: List[Tuple[Path, Exception]]) -> None:
+        super().__init__(
+            f"{len(errors)} write(s) failed:\n"
+            + "\n".join(f"\t{path}: {error}" for path, error in errors)
+        )
+        self.errors = errors
+
+
+def write_text_atomic(path: Path, text: str, fsync: bool = False) -> None:
+    """Write a text file atomically through a temporary file and a rename.
+
+    Parameters
+    ----------
+    path
+        File path.
+    text
+        File content.
+    fsync
+        Sync the file and its directory to disk.
+
+    Returns
+    -------
+    :code:`None`
+    """
+    temporary_file_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with temporary_file_path.open("w") as temporary_file:
+            temporary_file.write(text)
+            if fsync:
+                temporary_file.flush()
+                os.fsync(temporary_file.fileno())
+        os.replace(temporary_file_path, path)
+    except BaseException:
+        temporary_file_path.unlink(missing_ok=True)
+        raise
+
+    if fsync:
+        _fsync_dir(path.parent)
+
+
+class WriteBehindWriter:
+    """Asynchronous file writer with a bounded queue and a thread pool.
+
+    Use as a context manager, so that all the writes are drained (and
+    failures raised) at the end of the stage:
+
+    .. code-block:: python
+
+        with WriteBehindWriter() as writer:
+            writer.write_text(path, text)
+
+    Parameters
+    ----------
+    max_pending
+        Maximum number of queued writes before :meth:`write_text` blocks.
+    workers
+        Number of writer threads.
+    fsync_policy
+        Fsync policy.
+    fsync_batch_size
+        Number of written files per sync with :code:`FsyncPolicy.BATCH`.
+    """
+
+    def __init__(
+        self,
+        max_pending: int = 256,
+        workers: int = 4,
+        fsync_policy: FsyncPolicy = FsyncPolicy.BATCH,
+        fsync_batch_size: int = 64,
+    ) -> None:
+        self.fsync_policy = fsync_policy
+        self.fsync_batch_size = fsync_batch_size
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.lock = threading.Lock()
+        self.unsynced_paths: List[Path] = []
+        self.errors: List[Tuple[Path, Exception]] = []
+        self.threads = [
+            threading.Thread(target=self._work, daemon=True) for _ in range(workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def __enter__(self) -> "WriteBehindWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            self.close()
+        except WriteError:
+            # Do not mask the exception that interrupted the stage:
+            if exc_type is None:
+                raise
+
+    def write_text(self, path: Path, text: str) -> None:
+        """Queue a text file write.
+
+        Parameters
+        ----------
+        path
+            File path.
+        text
+            File content.
+
+        Returns
+        -------
+        :code:`None`
+        """
+        self.queue.put((path, text))
+
+    def flush(self) -> None:
+        """Wait for all the queued writes to complete and sync batched files.
+
+        Raises
+        ------
+        :code:`WriteError`
+            If any of the queued writes has failed since the last flush.
+
+        Returns
+        -------
+        :code:`None`
+        """
+        self.queue.join()
+        self._fsync_batch(force=True)
+
+        with self.lock:
+            errors, self.errors = self.errors, []
+        if errors:
+            raise WriteError(errors)
+
+    def close(self) -> None:
+        """Flush and stop the writer threads.
+
+        Raises
+        ------
+        :code:`WriteError`
+            If any of the queued writes has failed since the last flush.
+
+        Returns
+        -------
+        :code:`None`
+        """
+        try:
+            self.flush()
+        finally:
+            for _ in self.threads:
+                self.queue.put(None)
+            for thread in self.threads:
+                thread.join()
+
+    def _work(self) -> None:
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                path, text = item
+                try:
+                    write_text_atomic(
+                        path, text, fsync=self.fsync_policy is FsyncPolicy.ALWAYS
+                    )
+                    if self.fsync_policy is FsyncPolicy.BATCH:
+                        with self.lock:
+                            self.unsynced_paths.append(path)
+                        self._fsync_batch()
+                except Exception as err:  # pylint: disable=broad-except
+                    with self.lock:
+                        self.errors.append((path, err))
+            finally:
+                self.queue.task_done()
+
+    def _fsync_batch(self, force: bool = False) -> None:
+        with self.lock:
+            if not self.unsynced_paths or (
+                len(self.unsynced_paths) < self.fsync_batch_size and not force
+            ):
+                return
+            batch, self.unsynced_paths = self.unsynced_paths, []
+
+        for path in batch:
+            try:
+                file_descriptor = os.open(path, os.O_RDONLY)
+                try:
+                    os.fsync(file_descriptor)
+                finally:
+                    os.close(file_descriptor)
+            except OSError as err:
+                with self.lock:
+                    self.errors.append((path, err))
+        for dir_path in {path.parent for path in batch}:
+            _fsync_dir(dir_path)
+
+
+def _fsync_dir(dir_path: Path) -> None:
+    # Directory entries (i.e. renames) need their own sync; not supported on
+    # Windows, where there is no such guarantee to get anyway.
+    if os.name != "posix":
+        return
+    file_descriptor = os.open(dir_path, os.O_RDONLY)
+    try:
+        os.fsync(file_descriptor)
+    finally:
+        os.close(file_descriptor)
@@ -0,0 +1,38 @@
+"""
+Clean Tests
+===========
+"""
+# Data Science
+import pandas as pd
+
+# Project ------------------------------------------------------------------------------
+from lyrics_classifier.collect_data.clean import drop_duplicate_delta_songs
+
+
+def _songs(*rows):
+    return pd.DataFrame(rows, columns=["artist", "song_title", "song_path"])
+
+
+def test_drop_duplicate_delta_songs_compares_with_existing_songs():
+    """Delta songs duplicating existing songs of the same artist are dropped."""
+    existing = _songs(
+        ("Dire Straits", "Song0", "/lyric/0"),
+        ("Dire Straits", "Walk of Life", "/lyric/1"),
+        ("The Animals", "House of the Rising Sun", "/lyric/2"),
+    )
+    delta = _songs(
+        # Duplicate of an existing song after title uniformization:
+        ("Dire Straits", "Song0 (Remastered)", "/lyric/3"),
+        # Fuzzy duplicate of an existing song:
+        ("Dire Straits", "Walk of Lifes", "/lyric/4"),
+        # New song:
+        ("Dire Straits", "Sultans of Swing", "/lyric/5"),
+        # Same title as an existing song, but of another artist:
+        ("The Waterboys", "Song0", "/lyric/6"),
+        # Changed song, replacing the existing song with the same path:
+        ("The Animals", "House of the Rising Sun (Live)", "/lyric/2"),
+    )
+
+    deduplicated = drop_duplicate_delta_songs(delta, existing, processes=2)
+
+    assert deduplicated["song_path"].tolist() == ["/lyric/5", "/lyric/6", "/lyric/2"]